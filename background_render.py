@@ -0,0 +1,70 @@
+import queue
+import threading
+
+POLL_INTERVAL_MS = 50
+
+
+class RenderCancelled(Exception):
+    pass
+
+
+class RenderWorker:
+    def __init__(self, root, on_progress):
+        self.root = root
+        self.on_progress = on_progress
+        self.generation = 0
+        self.active = None
+        self.polling = False
+        self.results = queue.Queue()
+
+    def submit(self, work, on_done, *args):
+        # a newer job supersedes the running one: its next check() raises RenderCancelled
+        self.generation += 1
+        self.active = generation = self.generation
+
+        def check(fraction, phase):
+            if generation != self.generation:
+                raise RenderCancelled()
+            self.results.put((generation, 'progress', (fraction, phase)))
+
+        thread = threading.Thread(target=self.run, args=(generation, work, on_done, check, args), daemon=True)
+        thread.start()
+        if not self.polling:
+            self.polling = True
+            self.root.after(POLL_INTERVAL_MS, self.poll)
+
+    def run(self, generation, work, on_done, check, args):
+        try:
+            result = work(*args, check=check)
+            self.results.put((generation, 'done', (on_done, result, None)))
+        except RenderCancelled:
+            pass
+        except Exception as e:
+            self.results.put((generation, 'done', (on_done, None, e)))
+
+    def cancel(self):
+        if self.active is not None:
+            self.generation += 1
+            self.active = None
+            self.on_progress(None, None)
+
+    def poll(self):
+        while True:
+            try:
+                generation, kind, payload = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self.generation:
+                continue
+            if kind == 'progress':
+                self.on_progress(*payload)
+            else:
+                on_done, result, error = payload
+                self.active = None
+                self.on_progress(None, None)
+                on_done(result, error)
+
+        if self.active is None:
+            self.polling = False
+        else:
+            self.root.after(POLL_INTERVAL_MS, self.poll)
@@ -0,0 +1,63 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gantt_render import GanttChart
+from persian_calendar import EPOCH_ORDINAL
+from task_store import TaskStore
+
+COLORS = ["blue", "green", "red", "orange", "purple", "yellow", "cyan", "magenta"]
+FIRST_DAY = 738000
+ZOOM_LEVELS = [
+    ("all", None, None),
+    ("1 year", 365, None),
+    ("1 month", 30, 200),
+    ("1 week", 7, 20),
+]
+
+
+def make_tasks(count, years, seed=1404):
+    rng = random.Random(seed)
+    tasks = TaskStore()
+    for i in range(count):
+        start = FIRST_DAY + rng.randrange(years * 365)
+        tasks.append(f"تسک شماره {i}", start, start + rng.randrange(1, 90), rng.choice(COLORS))
+    return tasks
+
+
+def time_zoom(chart, days, rows):
+    if days is not None:
+        x0 = FIRST_DAY - EPOCH_ORDINAL + 400
+        chart.ax.set_xlim(x0, x0 + days)
+    if rows is not None:
+        y0 = len(chart.row_ids) // 2
+        chart.ax.set_ylim(y0, y0 + rows)
+    t0 = time.perf_counter()
+    chart.figure.canvas.draw()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Draw time of a long-range chart at several zoom levels, with and without level of detail.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'tasks':>8} {'zoom':>8} {'lod (s)':>9} {'mode':>8} {'labels':>7} {'full (s)':>9}")
+    for size in args.sizes:
+        tasks = make_tasks(size, args.years)
+        for name, days, rows in ZOOM_LEVELS:
+            results = []
+            for lod in (True, False):
+                chart = GanttChart(tasks, figsize=(12, 8), lod=lod)
+                results.append((time_zoom(chart, days, rows), chart))
+            (lod_time, lod_chart), (full_time, _) = results
+            mode = "bars" if lod_chart.detail else "density"
+            print(f"{size:8d} {name:>8} {lod_time:9.3f} {mode:>8} {len(lod_chart.bar_labels):7d} {full_time:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gantt_render import GanttChart, persian_text
+from task_store import TaskStore
+
+COLORS = ["blue", "green", "red", "orange", "purple", "yellow", "cyan", "magenta"]
+
+
+def make_tasks(count, seed=1404):
+    rng = random.Random(seed)
+    base = datetime(2025, 3, 21)
+    tasks = TaskStore()
+    for i in range(count):
+        start = base + timedelta(days=rng.randrange(365))
+        end = start + timedelta(days=rng.randrange(1, 60))
+        tasks.append(f"تسک شماره {i}", start, end, rng.choice(COLORS))
+    return tasks
+
+
+def legacy_draw(ax, tasks):
+    for i, task in enumerate(tasks):
+        start_date = mdates.date2num(task['start'])
+        end_date = mdates.date2num(task['end'])
+        duration = end_date - start_date
+        ax.barh(persian_text(task['name']), duration, left=start_date, height=0.6,
+                color=task['color'], edgecolor='black', alpha=0.8)
+        ax.text(start_date + duration / 2, i, persian_text(f"{task['duration']} روز"),
+                ha='center', va='center', color='black', fontsize=36, fontweight='bold')
+
+
+def legacy_build(tasks):
+    fig, ax = plt.subplots(figsize=(12, 8))
+    legacy_draw(ax, list(tasks))
+    return fig, ax
+
+
+def batched_build(tasks):
+    chart = GanttChart(tasks, figsize=(12, 8))
+    return chart.figure, chart.ax
+
+
+def time_draw(build, tasks):
+    t0 = time.perf_counter()
+    fig, ax = build(tasks)
+    fig.canvas.draw()
+    elapsed = time.perf_counter() - t0
+    artists = len(ax.get_children())
+    plt.close(fig)
+    return elapsed, artists
+
+
+def time_incremental_add(tasks):
+    chart = GanttChart(tasks, figsize=(12, 8))
+    chart.figure.canvas.draw()
+    task_id = tasks.append("تسک جدید", 739000, 739010, "blue")
+    t0 = time.perf_counter()
+    chart.update()
+    elapsed = time.perf_counter() - t0
+    tasks.remove(task_id)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-task and batched Gantt bar rendering.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--legacy-limit", type=int, default=10000,
+                        help="skip the per-task renderer above this many tasks")
+    args = parser.parse_args()
+
+    print(f"{'tasks':>8} {'legacy (s)':>12} {'artists':>8} {'batched (s)':>12} {'artists':>8} {'add (ms)':>9}")
+    for size in args.sizes:
+        tasks = make_tasks(size)
+        if size <= args.legacy_limit:
+            legacy_time, legacy_artists = time_draw(legacy_build, tasks)
+            legacy = f"{legacy_time:12.3f} {legacy_artists:8d}"
+        else:
+            legacy = f"{'-':>12} {'-':>8}"
+        batched_time, batched_artists = time_draw(batched_build, tasks)
+        add_time = time_incremental_add(tasks)
+        print(f"{size:8d} {legacy} {batched_time:12.3f} {batched_artists:8d} {add_time * 1000:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from resources import ResourceLoad, ResourcePool
+from task_store import TaskStore
+
+FIRST_DAY = 738000
+
+
+def make_project(tasks_count, resources_count, assignments, seed=1404):
+    rng = np.random.default_rng(seed)
+    tasks = TaskStore()
+    starts = FIRST_DAY + rng.integers(0, 3 * 365, tasks_count)
+    tasks.intern_color("blue")
+    tasks.extend([f"تسک شماره {i}" for i in range(tasks_count)], starts, starts + rng.integers(0, 60, tasks_count),
+                 np.zeros(tasks_count, dtype=np.uint16))
+    pool = ResourcePool()
+    for i in range(resources_count):
+        pool.add_resource(f"منبع {i}", capacity=rng.choice([1.0, 2.0, 4.0]))
+    pool.extend(rng.integers(0, tasks_count, assignments), rng.integers(0, resources_count, assignments),
+                rng.choice([0.25, 0.5, 1.0], assignments))
+    return tasks, pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the sweep-line resource load on a random project.")
+    parser.add_argument("--tasks", type=int, default=200000)
+    parser.add_argument("--resources", type=int, default=10000)
+    parser.add_argument("--assignments", type=int, default=1000000)
+    args = parser.parse_args()
+
+    tasks, pool = make_project(args.tasks, args.resources, args.assignments)
+    t0 = time.perf_counter()
+    load = ResourceLoad(tasks, pool)
+    t1 = time.perf_counter()
+    resources, starts, ends, peaks = load.overloads()
+    t2 = time.perf_counter()
+    days, totals = load.total()
+    t3 = time.perf_counter()
+    print(f"load curves: {t1 - t0:.3f} s ({len(load.days)} steps)")
+    print(f"overloads: {t2 - t1:.3f} s ({len(starts)} intervals on {len(np.unique(resources))} resources)")
+    print(f"total load: {t3 - t2:.3f} s ({len(days)} steps)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scheduling import DEPENDENCY_KINDS, Schedule
+from task_store import TaskStore
+
+FIRST_DAY = 738000
+
+
+def make_project(count, edges, seed=1404):
+    rng = np.random.default_rng(seed)
+    tasks = TaskStore()
+    starts = FIRST_DAY + rng.integers(0, 365, count)
+    tasks.intern_color("blue")
+    tasks.extend([f"تسک شماره {i}" for i in range(count)], starts, starts + rng.integers(0, 30, count),
+                 np.zeros(count, dtype=np.uint16))
+    # edges always point from a lower to a higher id, so the random graph is acyclic
+    a = rng.integers(0, count, edges)
+    b = rng.integers(0, count, edges)
+    keep = a != b
+    preds, succs = np.minimum(a, b)[keep], np.maximum(a, b)[keep]
+    kinds = rng.choice(DEPENDENCY_KINDS, len(preds), p=[0.8, 0.1, 0.1])
+    return tasks, preds, succs, kinds
+
+
+def timed(function, *args):
+    t0 = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time bulk scheduling and incremental updates on a random dependency graph.")
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--edges", type=int, default=500000)
+    parser.add_argument("--updates", type=int, default=200)
+    args = parser.parse_args()
+
+    tasks, preds, succs, kinds = make_project(args.tasks, args.edges)
+    schedule = Schedule(tasks)
+    print(f"bulk load ({len(preds)} edges): {timed(schedule.add_dependencies, preds, succs, kinds):.3f} s")
+    print(f"critical path: {timed(schedule.critical):.3f} s")
+
+    rng = random.Random(1404)
+    ids = tasks.ids().tolist()
+    delays, links, cycles = [], [], 0
+    for _ in range(args.updates):
+        task_id = rng.choice(ids)
+        start = schedule.anchors[task_id] + rng.randrange(1, 10)
+        delays.append(timed(schedule.set_dates, task_id, start, start + schedule.durations[task_id]))
+
+        pred, succ = rng.sample(ids, 2)
+        t0 = time.perf_counter()
+        try:
+            schedule.add_dependency(pred, succ)
+        except ValueError:
+            cycles += 1
+        links.append(time.perf_counter() - t0)
+
+    for name, times in (("delay a task", delays), ("add a dependency", links)):
+        times = np.array(times) * 1000
+        print(f"{name}: median {np.median(times):.2f} ms, p95 {np.percentile(times, 95):.2f} ms, max {times.max():.2f} ms")
+    print(f"rejected cycles: {cycles}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from persian_calendar import jalali_label
+from synthetic import make_project
+
+
+def make_payloads(count, tasks, seed):
+    # `count` different projects as the JSON the service accepts; the first task's name
+    # differs between them, so each one is a separate cache entry
+    project = make_project(tasks, seed)
+    ids = project.ids().tolist()
+    items = [{
+        "name": project.names[project.name_ids[task_id]],
+        "start": jalali_label(int(project.starts[task_id])),
+        "end": jalali_label(int(project.ends[task_id])),
+        "color": project.palette[project.colors[task_id]],
+    } for task_id in ids]
+    first = items[0]["name"]
+    payloads = []
+    for number in range(count):
+        items[0] = dict(items[0], name=f"{first} ({number})")
+        payloads.append(json.dumps(items, ensure_ascii=False).encode("utf-8"))
+    return payloads
+
+
+async def request(reader, writer, host, target, body):
+    writer.write((f"POST {target} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    content = await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers, content
+
+
+async def client(host, port, target, payloads, order, results):
+    # one keep-alive connection per client, requests sent back to back
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for index in order:
+            t0 = time.perf_counter()
+            status, headers, content = await request(reader, writer, host, target, payloads[index])
+            results.append((time.perf_counter() - t0, status, headers.get("x-cache"), len(content)))
+            if headers.get("connection") == "close":
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, port)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, target, payloads, clients, requests, seed):
+    rng = np.random.default_rng(seed)
+    results = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, target, payloads, rng.integers(0, len(payloads), requests).tolist(), results)
+        for _ in range(clients)
+    ))
+    return time.perf_counter() - t0, results
+
+
+def start_server(port, workers, cache_dir, cache_size):
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "render_service.py"), "--port", str(port),
+                                "-j", str(workers), "--cache-dir", cache_dir, "--cache-size", str(cache_size)],
+                               cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    # the service prints a "Serving on ..." line once it is listening
+    for line in process.stdout:
+        if line.startswith("Serving"):
+            print(line.strip(), flush=True)
+            return process
+    process.kill()
+    raise RuntimeError("the render service did not start")
+
+
+def report(name, seconds, results):
+    latencies = np.array([result[0] for result in results]) * 1000
+    statuses = {}
+    for result in results:
+        statuses[result[1]] = statuses.get(result[1], 0) + 1
+    hits = sum(result[2] == "hit" for result in results)
+    print(f"{name}: {len(results)} requests in {seconds:.2f} s, {len(results) / seconds:.1f} req/s, "
+          f"cache hits {hits / max(len(results), 1):.0%}, status {statuses}")
+    print(f"    latency p50 {np.percentile(latencies, 50):.1f} ms, p95 {np.percentile(latencies, 95):.1f} ms, "
+          f"p99 {np.percentile(latencies, 99):.1f} ms, max {latencies.max():.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure throughput and p99 latency of the render service "
+                                                 "under concurrent clients.")
+    parser.add_argument("--url", help="an already running instance, e.g. http://127.0.0.1:8765 "
+                                      "(default: start one on --port with an empty cache)")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("-j", "--workers", type=int, default=0)
+    parser.add_argument("--cache-size", type=int, default=512, help="cache size in MB of the started instance")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--projects", type=int, default=20, help="distinct projects the clients pick from")
+    parser.add_argument("--tasks", type=int, default=50, help="tasks per project")
+    parser.add_argument("--format", choices=("png", "svg"), default="png")
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1404)
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.projects, args.tasks, args.seed)
+    target = f"/render?format={args.format}&dpi={args.dpi}"
+    process = None
+    with tempfile.TemporaryDirectory() as cache_dir:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            host, port = "127.0.0.1", args.port
+            process = start_server(port, args.workers, cache_dir, args.cache_size)
+        try:
+            # the first pass renders (cold, unless the instance has seen these projects),
+            # the second is served from the cache
+            for name in ("cold", "warm"):
+                seconds, results = asyncio.run(run_load(host, port, target, payloads, args.clients, args.requests,
+                                                        args.seed))
+                report(name, seconds, results)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == "__main__":
+    main()
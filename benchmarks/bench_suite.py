@@ -0,0 +1,432 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gantt_render import render_chart, render_to_file
+from hierarchy import TaskTree
+from interval_index import IntervalIndex
+from persian_calendar import clear_caches, jalali_label, num_to_ordinal, persian_label, persian_text
+from project_file import ProjectFile
+from resources import ResourcePool
+from scheduling import Schedule
+from synthetic import make_project
+from tiled_export import export_pages
+
+PHASES = ("add_task", "display_task", "generate_gantt", "update", "drag", "export_chart", "save_project",
+          "open_project")
+ADD_COUNT = 100
+VISIBLE_ROWS = 30
+SCROLLS = 100
+DRAG_STEPS = 100
+CHART_SIZE = (12, 8)
+CURSOR_FORMAT = "تاریخ: %Y-%m-%d"
+PAGED_EXPORT_TASKS = 200
+# changes below this many seconds are timer noise, whatever the percentage
+NOISE_SECONDS = 0.005
+
+
+def measure(prepare, repeat):
+    # best of `repeat` timed runs
+    best = float("inf")
+    for _ in range(repeat):
+        run = prepare()
+        gc.collect()
+        t0 = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def proc_status(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) * 1024
+    raise OSError(field)
+
+
+def max_rss():
+    try:
+        # Linux keeps a resettable high-water mark; see reset_max_rss
+        return proc_status("VmHWM")
+    except OSError:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+def reset_max_rss():
+    # the peak so far is left over from imports and building the project; restart it from the
+    # current RSS so the phase's own peak is measured (Linux only, elsewhere the process peak is kept)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return proc_status("VmRSS")
+    except OSError:
+        return max_rss()
+
+
+def peak_rss(phase, size, args):
+    # Peak resident memory of one run in a fresh process. Unlike tracemalloc this sees Agg's
+    # render buffers and every other native allocation. The process's baseline (imports and
+    # the project itself) is reported separately.
+    command = [sys.executable, os.path.abspath(__file__), "--rss-child", phase, str(size), "--seed", str(args.seed)]
+    if args.tk:
+        command.append("--tk")
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"{size:>8} {phase:<15} memory run failed: {result.stderr.strip().splitlines()[-1:]}", file=sys.stderr)
+        return None, None
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    return data["peak_rss_bytes"], data["base_rss_bytes"]
+
+
+def rss_child(phase, size, seed, prepares):
+    project = make_project(size, seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        run = prepares[phase](project, workdir)()
+        gc.collect()
+        base = reset_max_rss()
+        run()
+        print(json.dumps({"peak_rss_bytes": max_rss(), "base_rss_bytes": base}))
+
+
+def drawn_chart(tasks):
+    # the chart the app shows: rendered at the window size, with a hierarchy and a resource pool
+    tasks = tasks.snapshot()
+    chart = render_chart(tasks, None, ResourcePool().snapshot(), TaskTree(tasks), CHART_SIZE)
+    chart.figure.canvas.draw()
+    return chart
+
+
+def prepare_add_task(project, workdir):
+    def prepare():
+        tasks = project.snapshot()
+        schedule = Schedule(tasks)
+        index = IntervalIndex(tasks)
+        first = int(project.starts[0])
+
+        def run():
+            for i in range(ADD_COUNT):
+                tasks.append(f"تسک افزوده {i}", first + i, first + i + 7, "blue")
+                schedule.sync()
+                index.extent()
+        return run
+    return prepare
+
+
+def prepare_display_task(project, workdir):
+    # what a scroll of the task list formats: one screen of rows at a new offset
+    def prepare():
+        clear_caches()
+        ids = project.ids()
+        offsets = np.random.default_rng(1404).integers(0, max(1, len(ids) - VISIBLE_ROWS), SCROLLS).tolist()
+
+        def run():
+            for offset in offsets:
+                for task_id in ids[offset:offset + VISIBLE_ROWS].tolist():
+                    persian_text(project.names[project.name_ids[task_id]])
+                    jalali_label(int(project.starts[task_id]))
+                    jalali_label(int(project.ends[task_id]))
+        return run
+    return prepare
+
+
+def prepare_generate_gantt(project, workdir):
+    def prepare():
+        clear_caches()
+        tasks = project.snapshot()
+        # what generate_gantt hands to the render worker
+        tree, resources = TaskTree(tasks), ResourcePool()
+        return lambda: render_chart(tasks, None, resources.snapshot(), tree.snapshot(tasks), CHART_SIZE)
+    return prepare
+
+
+def prepare_update(project, workdir):
+    def prepare():
+        chart = drawn_chart(project)
+        first = int(project.starts[0])
+
+        def run():
+            chart.tasks.append("تسک جدید", first, first + 10, "blue")
+            chart.update()
+            chart.figure.canvas.draw()
+        return run
+    return prepare
+
+
+def prepare_drag(project, workdir):
+    # the work of flush_vline per mouse move, blitting onto the Agg canvas
+    def prepare():
+        chart = drawn_chart(project)
+        canvas, ax = chart.figure.canvas, chart.ax
+        x0, x1 = ax.get_xlim()
+        line = ax.axvline(x=x0, color='red', linestyle='--', linewidth=1, animated=True)
+        text = ax.text(x0, 0.98, "", transform=ax.get_xaxis_transform(), ha='center', va='top', animated=True)
+        background = canvas.copy_from_bbox(chart.figure.bbox)
+        positions = np.linspace(x0, x1, DRAG_STEPS).tolist()
+
+        def run():
+            for x in positions:
+                ordinal = num_to_ordinal(x)
+                active = chart.index.stab(ordinal)
+                label = persian_label(ordinal, CURSOR_FORMAT)
+                if len(active):
+                    label = f"{label}\n{persian_text(f'{len(active)} تسک فعال')}"
+                line.set_xdata([x, x])
+                text.set_text(label)
+                text.set_x(x)
+                canvas.restore_region(background)
+                ax.draw_artist(line)
+                ax.draw_artist(text)
+                canvas.blit(chart.figure.bbox)
+        return run
+    return prepare
+
+
+def prepare_export_chart(project, workdir):
+    def prepare():
+        tasks = project.snapshot()
+        if len(tasks) > PAGED_EXPORT_TASKS:
+            path = os.path.join(workdir, "chart.pdf")
+            return lambda: export_pages(tasks, path, "pdf", dpi=100)
+        path = os.path.join(workdir, "chart.png")
+        return lambda: render_to_file(tasks, path, dpi=100)
+    return prepare
+
+
+def prepare_save_project(project, workdir):
+    path = os.path.join(workdir, "project.gantt")
+
+    def prepare():
+        tasks = project.snapshot()
+        return lambda: ProjectFile(path).write(tasks)
+    return prepare
+
+
+def prepare_open_project(project, workdir):
+    path = os.path.join(workdir, "opened.gantt")
+    ProjectFile(path).write(project.snapshot())
+
+    def prepare():
+        def run():
+            opened, tasks = ProjectFile.open(path)
+            len(tasks.ids())
+            opened.close()
+        return run
+    return prepare
+
+
+PREPARE = {phase: globals()[f"prepare_{phase}"] for phase in PHASES}
+
+
+class TkDriver:
+    # runs the real app in a withdrawn window; Tk events are processed with update()
+    # instead of mainloop, so every phase ends once its UI work has been drawn
+    def __init__(self):
+        import customtkinter as ctk
+        from gantt import GanttChartApp
+        self.root = ctk.CTk()
+        self.root.withdraw()
+        self.app = GanttChartApp(self.root)
+
+    def load(self, project):
+        app = self.app
+        app.clear_all()
+        app.tasks = project.snapshot()
+        app.reset_schedule()
+        app.index = IntervalIndex(app.tasks)
+        app.task_list.set_tasks(app.tasks, app.tree)
+        self.root.update()
+
+    def wait_for_chart(self):
+        while self.app.chart is None:
+            self.root.update()
+            time.sleep(0.001)
+        self.root.update()
+
+    def prepare_add_task(self, project, workdir):
+        def prepare():
+            self.load(project)
+            self.app.predecessors_entry.delete(0, "end")
+            self.app.resources_entry.delete(0, "end")
+
+            def run():
+                for i in range(ADD_COUNT):
+                    self.app.task_name_entry.delete(0, "end")
+                    self.app.task_name_entry.insert(0, f"تسک افزوده {i}")
+                    self.app.add_task()
+                    self.root.update()
+            return run
+        return prepare
+
+    def prepare_display_task(self, project, workdir):
+        def prepare():
+            clear_caches()
+            self.load(project)
+            fractions = np.random.default_rng(1404).random(SCROLLS).tolist()
+
+            def run():
+                for fraction in fractions:
+                    self.app.task_list.yview('moveto', fraction)
+                    self.root.update()
+            return run
+        return prepare
+
+    def prepare_generate_gantt(self, project, workdir):
+        def prepare():
+            clear_caches()
+            self.load(project)
+
+            def run():
+                self.app.generate_gantt()
+                self.wait_for_chart()
+            return run
+        return prepare
+
+    def prepare_drag(self, project, workdir):
+        from matplotlib.backend_bases import MouseEvent
+
+        def prepare():
+            self.load(project)
+            self.app.generate_gantt()
+            self.wait_for_chart()
+            app = self.app
+            x0, x1 = app.ax.get_xlim()
+            y = sum(app.ax.get_ylim()) / 2
+            points = [app.ax.transData.transform((x, y)) for x in np.linspace(x0, x1, DRAG_STEPS).tolist()]
+
+            def event(name, point):
+                return MouseEvent(name, app.canvas, point[0], point[1], button=1)
+
+            def run():
+                app.on_click(event('button_press_event', points[0]))
+                self.root.update()
+                for point in points[1:]:
+                    app.on_motion(event('motion_notify_event', point))
+                    app.flush_vline()
+                    self.root.update()
+                app.on_release(event('button_release_event', points[-1]))
+                self.root.update()
+            return run
+        return prepare
+
+
+def phase_allowed(phase, size, args):
+    if phase == "export_chart":
+        return size <= args.export_limit
+    if phase in ("generate_gantt", "update", "drag"):
+        return size <= args.render_limit
+    return True
+
+
+def run_suite(args, prepares):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            project = make_project(size, args.seed)
+            results[str(size)] = sizes = {}
+            for phase in args.phases:
+                if not phase_allowed(phase, size, args):
+                    continue
+                seconds = measure(prepares[phase](project, workdir), args.repeat)
+                peak, base = (None, None) if args.no_memory else peak_rss(phase, size, args)
+                sizes[phase] = {"seconds": seconds, "peak_rss_bytes": peak, "base_rss_bytes": base}
+                print(f"{size:>8} {phase:<15} {seconds * 1000:>10.1f} ms"
+                      + ("" if peak is None else f" {peak / 2 ** 20:>9.1f} MB peak RSS"
+                                                 f" ({(peak - base) / 2 ** 20:+.1f} MB in the phase)"), flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for size, phases in results.items():
+        for phase, result in phases.items():
+            base = baseline.get(size, {}).get(phase)
+            if base is None:
+                continue
+            for key, unit, scale in (("seconds", "ms", 1000), ("peak_rss_bytes", "MB", 2 ** -20)):
+                new, old = result.get(key), base.get(key)
+                if new is None or not old:
+                    continue
+                change = new / old - 1
+                noise = key == "seconds" and new - old < NOISE_SECONDS
+                flag = "REGRESSION" if change > tolerance and not noise else ""
+                print(f"{size:>8} {phase:<15} {old * scale:>10.1f} -> {new * scale:>10.1f} {unit} {change:>+8.1%} {flag}")
+                if flag:
+                    regressions.append((size, phase, key))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and measure every app phase on seeded synthetic Persian projects.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000, 100000])
+    parser.add_argument("--phases", nargs="+", choices=PHASES, default=list(PHASES))
+    parser.add_argument("--seed", type=int, default=1404)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak RSS run of each phase")
+    parser.add_argument("--rss-child", nargs=2, metavar=("PHASE", "SIZE"), help=argparse.SUPPRESS)
+    parser.add_argument("--tk", action="store_true",
+                        help="drive add_task, display_task, generate_gantt and drag through the real Tk app "
+                             "(needs a display)")
+    parser.add_argument("--render-limit", type=int, default=1000000)
+    parser.add_argument("--export-limit", type=int, default=1000,
+                        help="skip export above this many tasks (paged export of 1M tasks takes a long time)")
+    parser.add_argument("--save", help="write the results as JSON, e.g. to use as a baseline")
+    parser.add_argument("--baseline", help="compare against a JSON file written by --save")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="flag phases this much slower or bigger than the baseline")
+    args = parser.parse_args()
+
+    prepares = dict(PREPARE)
+    if args.tk:
+        import tkinter
+        try:
+            driver = TkDriver()
+        except tkinter.TclError as e:
+            print(f"Tk is not available: {e}", file=sys.stderr)
+            return 2
+        for phase in ("add_task", "display_task", "generate_gantt", "drag"):
+            prepares[phase] = getattr(driver, f"prepare_{phase}")
+    if args.rss_child:
+        rss_child(args.rss_child[0], int(args.rss_child[1]), args.seed, prepares)
+        return 0
+
+    results = run_suite(args, prepares)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "matplotlib": matplotlib.__version__,
+                "machine": platform.platform(),
+                "seed": args.seed,
+                "results": results,
+            }, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("seed") != args.seed:
+            print(f"warning: baseline was generated with seed {baseline.get('seed')}", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s)", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
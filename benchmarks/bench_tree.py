@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hierarchy import ROOT, TaskTree
+from synthetic import make_project
+
+
+def make_wbs(count, fanout, seed=1404):
+    # a balanced work-breakdown structure: task i is a child of (i - 1) // fanout, so
+    # the leaves are the last tasks and the first ones are nested summary levels
+    tasks = make_project(count, seed)
+    ids = np.arange(count)
+    parents = np.where(ids == 0, ROOT, (ids - 1) // fanout)
+    return tasks, ids, parents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time summary rollups and expand/collapse on a synthetic WBS.")
+    parser.add_argument("--tasks", type=int, default=200000)
+    parser.add_argument("--fanout", type=int, default=8)
+    parser.add_argument("--edits", type=int, default=1000)
+    args = parser.parse_args()
+
+    tasks, ids, parents = make_wbs(args.tasks, args.fanout)
+    tree = TaskTree(tasks)
+    t0 = time.perf_counter()
+    tree.set_parents(ids, parents)
+    t1 = time.perf_counter()
+    print(f"bulk load and rollup: {t1 - t0:.3f} s ({len(tree)} summary tasks)")
+
+    t0 = time.perf_counter()
+    rows = tree.visible()[0]
+    t1 = time.perf_counter()
+    print(f"collapsed rows: {(t1 - t0) * 1000:.2f} ms ({len(rows)} rows)")
+
+    rng = np.random.default_rng(1404)
+    leaves = np.flatnonzero(~tree.is_summary(ids))
+    edited = rng.choice(leaves, args.edits).tolist()
+    t0 = time.perf_counter()
+    for task_id in edited:
+        start = int(tasks.starts[task_id]) + int(rng.integers(-30, 30))
+        tasks.set_dates([task_id], [start], [start + 5])
+        tree.rollup([task_id])
+    t1 = time.perf_counter()
+    print(f"leaf edit and rollup: {(t1 - t0) / args.edits * 1000:.3f} ms per edit")
+
+    path = [int(edited[0])]
+    path.extend(tree.ancestors(path[0]))
+    t0 = time.perf_counter()
+    for task_id in reversed(path[1:]):
+        tree.expand(task_id)
+        rows = tree.visible()[0]
+    t1 = time.perf_counter()
+    print(f"expand {len(path) - 1} levels: {(t1 - t0) * 1000:.2f} ms ({len(rows)} rows)")
+
+
+if __name__ == "__main__":
+    main()
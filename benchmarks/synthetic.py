@@ -0,0 +1,71 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from color_names import COLOR_MAP
+from persian_calendar import jalali_to_ordinals
+from task_store import TaskStore
+
+# 1399, 1403 and 1408 are leap years, so Esfand 30 and the year boundaries around it get exercised
+FIRST_YEAR = 1398
+LAST_YEAR = 1409
+LEAP_EDGE_FRACTION = 0.01
+COLOR_WEIGHTS = [0.3, 0.2, 0.15, 0.1, 0.1, 0.05, 0.05, 0.05]
+PERSIAN_DIGITS = str.maketrans("0123456789", "۰۱۲۳۴۵۶۷۸۹")
+
+ACTIONS = ["طراحی", "پیاده‌سازی", "بازبینی", "آزمون‌پذیری", "مستندسازی", "راه‌اندازی", "بهینه‌سازی",
+           "برنامه‌ریزی", "هماهنگ‌سازی", "نصب و پیکربندی", "تحویل‌گیری", "خرید"]
+SUBJECTS = ["زیرساخت شبکه", "پایگاه‌داده", "سامانه‌ی حسابداری", "رابط کاربری", "درگاه پرداخت", "نرم‌افزار انبار",
+            "ساختمان شماره‌ی دو", "تأسیسات برق", "قراردادهای پیمانکاران", "گزارش‌های مالی", "اسکلت فلزی",
+            "سامانه‌ی گرمایش"]
+DETAILS = ["مرحله‌ی نخست", "بخش شمالی", "نسخه‌ی آزمایشی", "با همکاری واحد فنی", "پیش از بهره‌برداری",
+           "طبق دستورالعمل جدید", "برای شعبه‌های استانی", "در سه‌ماهه‌ی دوم", ""]
+
+
+def random_starts(rng, count):
+    years = rng.integers(FIRST_YEAR, LAST_YEAR + 1, count)
+    months = rng.integers(1, 13, count)
+    firsts, _ = jalali_to_ordinals(years, months, np.ones(count, dtype=np.int64))
+    next_years, _ = jalali_to_ordinals(years + 1, np.ones(count, dtype=np.int64), np.ones(count, dtype=np.int64))
+    new_years, _ = jalali_to_ordinals(years, np.ones(count, dtype=np.int64), np.ones(count, dtype=np.int64))
+    lengths = np.where(months <= 6, 31, np.where(months <= 11, 30, next_years - new_years - 336))
+    starts = firsts + (rng.random(count) * lengths).astype(np.int64)
+
+    # a share of the tasks start on the last day of a year, which is Esfand 30 in leap years
+    edge = rng.random(count) < LEAP_EDGE_FRACTION
+    starts[edge] = next_years[edge] - 1
+    return starts
+
+
+def random_durations(rng, count):
+    # milestones, short tasks, typical tasks and long phases
+    kind = rng.choice(4, count, p=[0.05, 0.45, 0.35, 0.15])
+    low = np.array([0, 1, 8, 61])[kind]
+    high = np.array([0, 7, 60, 400])[kind]
+    return low + (rng.random(count) * (high - low + 1)).astype(np.int64)
+
+
+def random_names(rng, count):
+    # every name is distinct (the phase number), the worst case for the store's name table
+    actions = rng.integers(0, len(ACTIONS), count).tolist()
+    subjects = rng.integers(0, len(SUBJECTS), count).tolist()
+    details = rng.integers(0, len(DETAILS), count).tolist()
+    return [
+        f"{ACTIONS[a]} {SUBJECTS[s]} {DETAILS[d]} - فاز {str(i + 1).translate(PERSIAN_DIGITS)}".replace("  ", " ")
+        for i, (a, s, d) in enumerate(zip(actions, subjects, details))
+    ]
+
+
+def make_project(count, seed=1404):
+    # the same seed and count always give the same project
+    rng = np.random.default_rng(seed)
+    starts = random_starts(rng, count)
+    ends = starts + random_durations(rng, count)
+    tasks = TaskStore(capacity=max(count, 1))
+    for color in COLOR_MAP.values():
+        tasks.intern_color(color)
+    colors = rng.choice(len(COLOR_MAP), count, p=COLOR_WEIGHTS).astype(np.uint16)
+    tasks.extend(random_names(rng, count), starts, ends, colors)
+    return tasks
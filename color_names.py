@@ -0,0 +1,10 @@
+COLOR_MAP = {
+    "آبی": "blue",
+    "سبز": "green",
+    "قرمز": "red",
+    "نارنجی": "orange",
+    "بنفش": "purple",
+    "زرد": "yellow",
+    "فیروزه‌ای": "cyan",
+    "ارغوانی": "magenta"
+}
@@ -1,30 +1,53 @@
+from startup_timer import StartupTimer
+import os
+import sys
 import tkinter as tk
 import customtkinter as ctk
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from functools import partial
 import jdatetime as jdt
-import matplotlib.font_manager as fm
-from bidi.algorithm import get_display
-from arabic_reshaper import reshape
+from background_render import RenderWorker
+from color_names import COLOR_MAP
+from hierarchy import TaskTree
+from interval_index import IntervalIndex
+from profiler import profiler
+from project_file import SUFFIX, ProjectFile
+from resources import ResourcePool, level_resources
+from scheduling import FF, FS, SS, Schedule
+from task_list_view import TaskListView
+from task_store import TaskStore
+from persian_calendar import num_to_ordinal, persian_label, persian_text, precompute_labels
+
+startup = StartupTimer("--startup-profile" in sys.argv)
+startup.mark("imports")
+if "--profile" in sys.argv:
+    profiler.enable()
 
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("dark-blue")
 
-try:
-    font_path = "B-NAZANIN.TTF"
-    fm.fontManager.addfont(font_path)
-    prop = fm.FontProperties(fname=font_path)
-    plt.rcParams['font.family'] = prop.get_name()
-    plt.rcParams['axes.unicode_minus'] = False
-except Exception as e:
-    print(f"Error loading font: {e}")
-
-
-def persian_text(text):
-    reshaped_text = reshape(text)
-    return get_display(reshaped_text)
+MOTION_INTERVAL_MS = 16
+ZOOM_STEP = 1.25
+CURSOR_LABEL_FORMAT = "تاریخ: %Y-%m-%d"
+PRECOMPUTE_MAX_DAYS = 1000
+CURSOR_MAX_NAMES = 3
+PAGED_EXPORT_TASKS = 200
+DEPENDENCY_LABELS = {
+    "پایان به شروع": FS,
+    "شروع به شروع": SS,
+    "پایان به پایان": FF,
+}
+PREDECESSOR_SEPARATORS = str.maketrans("،", ",")
+PERSIAN_NUMBERS = str.maketrans("۰۱۲۳۴۵۶۷۸۹٫", "0123456789.")
+PHASE_LABELS = {
+    'figure': "آماده‌سازی نمودار",
+    'bars': "ساخت میله‌ها",
+    'draw': "رسم نمودار",
+    'save': "ذخیره فایل",
+    'pages': "رسم صفحه‌ها",
+    'tiles': "ساخت کاشی‌ها",
+    'done': "پایان",
+}
 
 
 class GanttChartApp:
@@ -32,15 +55,36 @@ class GanttChartApp:
         self.root = root
         self.root.title("تولید کننده نمودار گانت پیشرفته")
         self.root.geometry("1200x800")
+        self.tasks = TaskStore()
+        self.reset_schedule()
+        self.index = IntervalIndex(self.tasks)
+        self.resources = ResourcePool()
+        self.editing = None
         self.create_frames()
-        self.tasks = []
+        self.chart = None
+        self.chart_modules_loaded = False
+        self.importer = None
+        self.project = None
+        self.chart_worker = RenderWorker(self.root, self.show_progress)
+        self.export_worker = RenderWorker(self.root, self.show_progress)
         self.figure = None
         self.canvas = None
         self.ax = None
         self.current_vline = None
         self.vline_text = None
         self.dragging_vline = False
+        self.pending_vline_x = None
+        self.motion_job = None
+        self.background = None
         self.set_default_dates()
+        startup.mark("window")
+
+    def reset_schedule(self):
+        # the tree rolls summaries up when the schedule moves a task, and the schedule takes
+        # the rolled-up dates back, so summaries never hold stale dates in either
+        self.tree = TaskTree(self.tasks)
+        self.schedule = Schedule(self.tasks, on_commit=self.tree.rollup, summaries=self.tree.is_summary)
+        self.tree.on_rollup = self.schedule.reload
 
     def create_frames(self):
         self.input_frame = ctk.CTkFrame(self.root)
@@ -49,30 +93,22 @@ class GanttChartApp:
         self.button_frame = ctk.CTkFrame(self.root)
         self.button_frame.pack(pady=5, padx=10, fill="x")
 
-        self.tabview = ctk.CTkTabview(self.root)
+        self.tabview = ctk.CTkTabview(self.root, command=self.on_tab_changed)
         self.tabview.pack(pady=10, padx=10, expand=True, fill="both")
 
         self.tasks_tab = self.tabview.add(persian_text("تسک‌ها"))
         self.chart_tab = self.tabview.add(persian_text("نمودار گانت"))
+        self.diagnostics_tab = self.tabview.add(persian_text("عیب‌یابی"))
 
         self.configure_tasks_tab()
         self.configure_chart_tab()
+        self.configure_diagnostics_tab()
         self.create_input_widgets()
         self.create_action_buttons()
 
     def configure_tasks_tab(self):
-        self.tasks_canvas = ctk.CTkCanvas(self.tasks_tab)
-        self.tasks_canvas.pack(side="left", fill="both", expand=True)
-
-        self.scrollbar = ctk.CTkScrollbar(self.tasks_tab, orientation="vertical", command=self.tasks_canvas.yview)
-        self.scrollbar.pack(side="right", fill="y")
-
-        self.tasks_canvas.configure(yscrollcommand=self.scrollbar.set)
-        self.tasks_canvas.bind('<Configure>',
-                               lambda e: self.tasks_canvas.configure(scrollregion=self.tasks_canvas.bbox("all")))
-
-        self.tasks_frame = ctk.CTkFrame(self.tasks_canvas)
-        self.tasks_canvas.create_window((0, 0), window=self.tasks_frame, anchor="nw")
+        self.task_list = TaskListView(self.tasks_tab, self.tasks, self.remove_task, self.edit_task, self.tree,
+                                      self.toggle_task)
 
     def configure_chart_tab(self):
         self.chart_frame = ctk.CTkFrame(self.chart_tab)
@@ -85,6 +121,83 @@ class GanttChartApp:
         )
         self.chart_placeholder.pack(expand=True)
 
+    def configure_diagnostics_tab(self):
+        controls = ctk.CTkFrame(self.diagnostics_tab, fg_color="transparent")
+        controls.pack(fill="x", padx=10, pady=5)
+
+        self.profiler_switch = ctk.CTkSwitch(
+            controls,
+            text=persian_text("ثبت زمان‌بندی رسم"),
+            command=self.toggle_profiler,
+            font=("B-NAZANIN", 14)
+        )
+        if profiler.enabled:
+            self.profiler_switch.select()
+        self.profiler_switch.pack(side="right", padx=5)
+
+        for text, command in (("🔄 به‌روزرسانی", self.refresh_diagnostics),
+                              ("🧹 پاک کردن", self.clear_diagnostics),
+                              ("💾 ذخیره JSON", partial(self.export_profile, False)),
+                              ("💾 ذخیره Trace", partial(self.export_profile, True))):
+            ctk.CTkButton(controls, text=text, width=120, command=command,
+                          font=("B-NAZANIN", 14)).pack(side="right", padx=5)
+
+        self.diagnostics_text = ctk.CTkTextbox(self.diagnostics_tab, font=("Courier", 12), wrap="none")
+        self.diagnostics_text.pack(fill="both", expand=True, padx=10, pady=10)
+
+    def toggle_profiler(self):
+        if self.profiler_switch.get():
+            profiler.enable()
+        else:
+            profiler.disable()
+        self.refresh_diagnostics()
+
+    def refresh_diagnostics(self):
+        from persian_calendar import cache_stats
+        lines = [profiler.report(), ""]
+        for name, stats in cache_stats().items():
+            lines.append(f"{name:<24}hits {stats['hits']:>9}  misses {stats['misses']:>9}  size {stats['size']:>7}")
+        if self.chart:
+            lines.append("")
+            lines.append(", ".join(f"{key}={value}" for key, value in self.chart.artist_counts().items()))
+        self.diagnostics_text.delete("1.0", "end")
+        self.diagnostics_text.insert("1.0", "\n".join(lines))
+
+    def clear_diagnostics(self):
+        profiler.clear()
+        self.refresh_diagnostics()
+
+    def export_profile(self, trace):
+        from tkinter import filedialog
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            title="ذخیره گزارش زمان‌بندی"
+        )
+        if not file_path:
+            return
+        try:
+            profiler.save(file_path, trace=trace)
+        except OSError as e:
+            self.show_error(f"خطا در ذخیره گزارش: {str(e)}")
+            return
+        self.show_info(f"گزارش با موفقیت ذخیره شد:\n{file_path}")
+
+    def on_tab_changed(self):
+        if self.tabview.get() == persian_text("نمودار گانت"):
+            self.load_chart_modules()
+        elif self.tabview.get() == persian_text("عیب‌یابی"):
+            self.refresh_diagnostics()
+
+    def load_chart_modules(self):
+        # matplotlib, the Tk backend and the font are only loaded once a chart is needed
+        if self.chart_modules_loaded:
+            return
+        import gantt_render
+        from matplotlib.backends import backend_tkagg
+        self.chart_modules_loaded = True
+        startup.mark("chart modules")
+
     def set_default_dates(self):
         today_shamsi = jdt.datetime.now().strftime("%Y-%m-%d")
         next_week_shamsi = (jdt.datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d")
@@ -130,6 +243,39 @@ class GanttChartApp:
         self.color_combobox.grid(row=0, column=7, padx=5, pady=5, sticky="w")
         self.color_combobox.set("آبی")
 
+        ctk.CTkLabel(self.input_frame, text=persian_text("پیش‌نیازها:"), font=("B-NAZANIN", 14)).grid(row=1, column=0,
+                                                                                                      padx=5, pady=5,
+                                                                                                      sticky="e")
+        self.predecessors_entry = ctk.CTkEntry(self.input_frame, font=("B-NAZANIN", 14),
+                                               placeholder_text="نام تسک‌ها، جدا شده با ویرگول")
+        self.predecessors_entry.grid(row=1, column=1, columnspan=3, padx=5, pady=5, sticky="ew")
+
+        ctk.CTkLabel(self.input_frame, text=persian_text("نوع وابستگی:"), font=("B-NAZANIN", 14)).grid(row=1, column=4,
+                                                                                                       padx=5, pady=5,
+                                                                                                       sticky="e")
+        self.dependency_combobox = ctk.CTkComboBox(
+            self.input_frame,
+            values=list(DEPENDENCY_LABELS),
+            width=140,
+            font=("B-NAZANIN", 14)
+        )
+        self.dependency_combobox.grid(row=1, column=5, padx=5, pady=5, sticky="w")
+        self.dependency_combobox.set("پایان به شروع")
+
+        ctk.CTkLabel(self.input_frame, text=persian_text("منابع:"), font=("B-NAZANIN", 14)).grid(row=1, column=6,
+                                                                                                padx=5, pady=5,
+                                                                                                sticky="e")
+        self.resources_entry = ctk.CTkEntry(self.input_frame, font=("B-NAZANIN", 14),
+                                            placeholder_text="علی:1، جرثقیل:0.5")
+        self.resources_entry.grid(row=1, column=7, padx=5, pady=5, sticky="ew")
+
+        ctk.CTkLabel(self.input_frame, text=persian_text("والد:"), font=("B-NAZANIN", 14)).grid(row=2, column=0,
+                                                                                               padx=5, pady=5,
+                                                                                               sticky="e")
+        self.parent_entry = ctk.CTkEntry(self.input_frame, font=("B-NAZANIN", 14),
+                                         placeholder_text="نام تسک خلاصه")
+        self.parent_entry.grid(row=2, column=1, columnspan=3, padx=5, pady=5, sticky="ew")
+
     def create_action_buttons(self):
         button_config = {
             "width": 120,
@@ -172,6 +318,54 @@ class GanttChartApp:
         )
         self.export_button.pack(side="right", padx=5, pady=5)
 
+        self.level_button = ctk.CTkButton(
+            self.button_frame,
+            text="⚖ تسطیح منابع",
+            command=self.level_resources,
+            **button_config
+        )
+        self.level_button.pack(side="right", padx=5, pady=5)
+
+        self.import_button = ctk.CTkButton(
+            self.button_frame,
+            text="📥 ورود از فایل",
+            command=self.import_tasks,
+            **button_config
+        )
+        self.import_button.pack(side="right", padx=5, pady=5)
+
+        self.save_project_button = ctk.CTkButton(
+            self.button_frame,
+            text="💾 ذخیره پروژه",
+            command=self.save_project,
+            **button_config
+        )
+        self.save_project_button.pack(side="right", padx=5, pady=5)
+
+        self.open_project_button = ctk.CTkButton(
+            self.button_frame,
+            text="📂 باز کردن پروژه",
+            command=self.open_project,
+            **button_config
+        )
+        self.open_project_button.pack(side="right", padx=5, pady=5)
+
+        self.progress_frame = ctk.CTkFrame(self.button_frame, fg_color="transparent")
+        self.progress_label = ctk.CTkLabel(self.progress_frame, text="", font=("B-NAZANIN", 14))
+        self.progress_label.pack(side="right", padx=5)
+        self.progress_bar = ctk.CTkProgressBar(self.progress_frame, width=160)
+        self.progress_bar.pack(side="right", padx=5)
+        self.cancel_button = ctk.CTkButton(
+            self.progress_frame,
+            text="✕ لغو",
+            width=60,
+            fg_color="#D35B58",
+            hover_color="#C77C78",
+            command=self.cancel_rendering,
+            font=("B-NAZANIN", 14)
+        )
+        self.cancel_button.pack(side="right", padx=5)
+
     def add_task(self):
         try:
             task_name = self.task_name_entry.get().strip()
@@ -196,105 +390,217 @@ class GanttChartApp:
             if end_date < start_date:
                 raise ValueError("تاریخ پایان نمی‌تواند قبل از تاریخ شروع باشد")
 
-            duration = (end_date - start_date).days + 1
-
-            color_map = {
-                "آبی": "blue",
-                "سبز": "green",
-                "قرمز": "red",
-                "نارنجی": "orange",
-                "بنفش": "purple",
-                "زرد": "yellow",
-                "فیروزه‌ای": "cyan",
-                "ارغوانی": "magenta"
-            }
-            color = color_map[self.color_combobox.get()]
-
-            task = {
-                'name': task_name,
-                'start': start_date,
-                'end': end_date,
-                'color': color,
-                'duration': duration
-            }
-
-            self.tasks.append(task)
-            self.display_task(task)
-            self.task_name_entry.delete(0, "end")
-            self.set_default_dates()
+            predecessors = self.parse_predecessors()
+            assignments = self.parse_resources()
+            parent = self.parse_parent()
+            kind = DEPENDENCY_LABELS[self.dependency_combobox.get()]
+            if any(self.tree.is_summary(task_id) for task_id in predecessors):
+                raise ValueError("تسک خلاصه نمی‌تواند پیش‌نیاز باشد")
+            if self.editing is not None:
+                task_id = self.editing
+                summary = self.tree.is_summary(task_id)
+                if summary:
+                    # a summary's dates are rolled up from its children
+                    if predecessors:
+                        raise ValueError("تسک خلاصه نمی‌تواند پیش‌نیاز داشته باشد")
+                    task = self.tasks.get(task_id)
+                    if (start_date, end_date) != (task['start'], task['end']):
+                        raise ValueError("تاریخ تسک خلاصه از زیرتسک‌هایش محاسبه می‌شود و قابل ویرایش نیست")
+                if parent != self.tree.parent(task_id):
+                    self.tree.set_parent(task_id, parent)
+                if not summary:
+                    self.schedule.set_dates(task_id, start_date, end_date)
+            else:
+                color = COLOR_MAP[self.color_combobox.get()]
+                task_id = self.tasks.append(task_name, start_date, end_date, color)
+                if parent is not None:
+                    self.tree.set_parent(task_id, parent)
+            if parent is not None:
+                self.tree.expand(parent)
+            for predecessor in predecessors:
+                self.schedule.add_dependency(predecessor, task_id, kind)
+            if self.editing is not None:
+                self.resources.unassign(task_id)
+            for resource, units in assignments:
+                self.resources.assign(task_id, self.resources.resource_id(resource), units)
+            self.finish_editing()
+            self.task_list.refresh()
+            self.refresh_chart()
 
         except Exception as e:
             self.show_error(str(e))
 
-    def display_task(self, task):
-        task_frame = ctk.CTkFrame(self.tasks_frame)
-        task_frame.pack(fill="x", pady=2, padx=5)
+    def parse_predecessors(self):
+        predecessors = []
+        text = self.predecessors_entry.get().translate(PREDECESSOR_SEPARATORS)
+        for name in filter(None, (part.strip() for part in text.split(","))):
+            task_id = self.tasks.find(name)
+            if task_id is None:
+                raise ValueError(f"تسک پیش‌نیاز «{name}» پیدا نشد")
+            predecessors.append(task_id)
+        return predecessors
+
+    def parse_parent(self):
+        name = self.parent_entry.get().strip()
+        if not name:
+            return None
+        task_id = self.tasks.find(name)
+        if task_id is None:
+            raise ValueError(f"تسک والد «{name}» پیدا نشد")
+        if len(self.schedule.predecessors(task_id)) or len(self.schedule.successors(task_id)):
+            raise ValueError(f"تسک «{name}» وابستگی دارد و نمی‌تواند تسک خلاصه باشد")
+        return task_id
+
+    def parse_resources(self):
+        assignments = []
+        text = self.resources_entry.get().translate(PREDECESSOR_SEPARATORS)
+        for part in filter(None, (part.strip() for part in text.split(","))):
+            name, _, units = part.partition(":")
+            try:
+                units = float(units.translate(PERSIAN_NUMBERS)) if units.strip() else 1.0
+            except ValueError:
+                raise ValueError(f"مقدار تخصیص منبع نامعتبر است: {part}")
+            if not name.strip() or units <= 0:
+                raise ValueError(f"مقدار تخصیص منبع نامعتبر است: {part}")
+            assignments.append((name.strip(), units))
+        return assignments
+
+    def edit_task(self, task):
+        self.editing = task['id']
+        self.task_name_entry.delete(0, "end")
+        self.task_name_entry.insert(0, task['name'])
+        self.task_name_entry.configure(state="disabled")
+        self.start_date_entry.delete(0, "end")
+        self.start_date_entry.insert(0, jdt.date.fromgregorian(date=task['start']).strftime("%Y-%m-%d"))
+        self.end_date_entry.delete(0, "end")
+        self.end_date_entry.insert(0, jdt.date.fromgregorian(date=task['end']).strftime("%Y-%m-%d"))
+        self.predecessors_entry.delete(0, "end")
+        self.parent_entry.delete(0, "end")
+        parent = self.tree.parent(task['id'])
+        if parent is not None:
+            self.parent_entry.insert(0, self.tasks.get(parent)['name'])
+        self.resources_entry.delete(0, "end")
+        self.resources_entry.insert(0, "، ".join(f"{name}:{units:g}" for name, units in self.resources.assignments(task['id'])))
+        self.add_button.configure(text="✔ ذخیره تغییرات")
+
+    def finish_editing(self):
+        self.editing = None
+        self.task_name_entry.configure(state="normal")
+        self.task_name_entry.delete(0, "end")
+        self.predecessors_entry.delete(0, "end")
+        self.parent_entry.delete(0, "end")
+        self.resources_entry.delete(0, "end")
+        self.add_button.configure(text="➕ افزودن تسک")
+        self.set_default_dates()
 
-        for i in range(5):
-            task_frame.grid_columnconfigure(i, weight=1)
+    def level_resources(self):
+        if not len(self.resources):
+            self.show_error("هیچ منبعی به تسک‌ها تخصیص داده نشده است.")
+            return
+        moved, remaining = level_resources(self.tasks, self.resources, self.schedule)
+        self.task_list.refresh()
+        self.refresh_chart()
+        self.show_info(f"{moved} تسک جابه‌جا شد\n{remaining} بازه اضافه‌بار باقی ماند")
 
-        name_label = ctk.CTkLabel(
-            task_frame,
-            text=task['name'],
-            width=200,
-            anchor="w",
-            font=("B-NAZANIN", 14)
-        )
-        name_label.grid(row=0, column=0, padx=5, sticky="e")
-
-        start_jdate = jdt.datetime.fromgregorian(date=task['start'])
-        start_str = start_jdate.strftime("%Y-%m-%d")
-        start_label = ctk.CTkLabel(
-            task_frame,
-            text=f"شروع: {start_str}",
-            anchor="w",
-            font=("B-NAZANIN", 14)
-        )
-        start_label.grid(row=0, column=1, padx=5, sticky="e")
-
-        end_jdate = jdt.datetime.fromgregorian(date=task['end'])
-        end_str = end_jdate.strftime("%Y-%m-%d")
-        end_label = ctk.CTkLabel(
-            task_frame,
-            text=f"پایان: {end_str}",
-            anchor="w",
-            font=("B-NAZANIN", 14)
-        )
-        end_label.grid(row=0, column=2, padx=5, sticky="e")
+    def critical_highlight(self):
+        # critical bars are only outlined once the project has dependencies
+        return self.schedule.critical() if len(self.schedule) else None
 
-        duration_label = ctk.CTkLabel(
-            task_frame,
-            text=f"مدت: {task['duration']} روز",
-            anchor="w",
-            font=("B-NAZANIN", 14)
-        )
-        duration_label.grid(row=0, column=3, padx=5, sticky="e")
-
-        color_frame = ctk.CTkFrame(
-            task_frame,
-            width=20,
-            height=20,
-            fg_color=task['color'],
-            corner_radius=3
+    def import_tasks(self):
+        from tkinter import filedialog
+        from task_import import BackgroundImport
+        file_path = filedialog.askopenfilename(
+            filetypes=[("Task files", "*.csv *.jsonl *.ndjson *.xlsx"), ("All files", "*.*")],
+            title="ورود تسک‌ها از فایل"
         )
-        color_frame.grid(row=0, column=4, padx=5, sticky="e")
-
-        delete_btn = ctk.CTkButton(
-            task_frame,
-            text="✕",
-            width=30,
-            fg_color="transparent",
-            hover_color="#D35B58",
-            text_color=("gray10", "gray90"),
-            command=lambda: self.remove_task(task_frame, task),
-            font=("B-NAZANIN", 14)
+        if not file_path:
+            return
+
+        self.import_button.configure(state="disabled")
+        self.importer = BackgroundImport(self.root, file_path, self.tasks, self.on_import_chunk, self.on_import_done)
+
+    def on_import_chunk(self, report):
+        if self.importer is not None and report is self.importer.report:
+            self.task_list.refresh()
+
+    def on_import_done(self, report, error):
+        from task_import import ImportCancelled
+        if self.importer is None or report is not self.importer.report:
+            # an import that was cancelled and has since been replaced by a newer one
+            return
+        self.importer = None
+        self.import_button.configure(state="normal")
+        if isinstance(error, ImportCancelled):
+            return
+        self.task_list.refresh()
+        self.refresh_chart()
+        if error is not None:
+            self.show_error(f"خطا در ورود فایل: {error}")
+        else:
+            self.show_info(report.summary())
+
+    def save_project(self):
+        if self.project is None:
+            from tkinter import filedialog
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=SUFFIX,
+                filetypes=[("Gantt project", f"*{SUFFIX}"), ("All files", "*.*")],
+                title="ذخیره پروژه"
+            )
+            if not file_path:
+                return
+            self.project = ProjectFile(file_path)
+
+        try:
+            self.project.save(self.tasks, self.tree, self.schedule, self.resources)
+            self.show_info(f"پروژه با موفقیت ذخیره شد:\n{self.project.path}")
+        except Exception as e:
+            self.show_error(f"خطا در ذخیره پروژه: {str(e)}")
+
+    def open_project(self):
+        from tkinter import filedialog
+        file_path = filedialog.askopenfilename(
+            filetypes=[("Gantt project", f"*{SUFFIX}"), ("All files", "*.*")],
+            title="باز کردن پروژه"
         )
-        delete_btn.grid(row=0, column=5, padx=5, sticky="e")
-        self.tasks_canvas.configure(scrollregion=self.tasks_canvas.bbox("all"))
+        if not file_path:
+            return
+
+        try:
+            project, tasks = ProjectFile.open(file_path)
+        except Exception as e:
+            self.show_error(f"خطا در باز کردن پروژه: {str(e)}")
+            return
 
-    def remove_task(self, task_frame, task):
-        task_frame.destroy()
-        self.tasks.remove(task)
+        if self.importer:
+            self.importer.cancel()
+        self.chart_worker.cancel()
+        self.close_chart()
+        if self.project:
+            self.project.close()
+        self.project = project
+        self.tasks = tasks
+        self.reset_schedule()
+        project.restore_tree(self.tree)
+        project.restore_dependencies(self.schedule)
+        self.index = IntervalIndex(self.tasks)
+        self.resources = ResourcePool()
+        project.restore_resources(self.resources)
+        self.finish_editing()
+        self.task_list.set_tasks(self.tasks, self.tree)
+
+    def remove_task(self, task):
+        # removing a summary task removes everything under it
+        removed = self.tree.subtree(task['id'])
+        if self.editing in removed:
+            self.finish_editing()
+        self.tree.remove(task['id'])
+        self.schedule.sync()
+        self.task_list.refresh()
+        if self.tasks:
+            self.refresh_chart()
+        else:
+            self.close_chart()
 
     def generate_gantt(self):
         if not self.tasks:
@@ -302,181 +608,263 @@ class GanttChartApp:
             return
 
         self.tabview.set(persian_text("نمودار گانت"))
+        self.load_chart_modules()
+        from gantt_render import render_chart
 
-        if self.canvas:
-            self.canvas.get_tk_widget().destroy()
-            plt.close(self.figure)
-
-        fig_height = max(4, len(self.tasks) * 0.6)
-        self.figure, self.ax = plt.subplots(figsize=(12, fig_height))
-        self.figure.subplots_adjust(right=0.9)
-
-        for i, task in enumerate(self.tasks):
-            start_date = mdates.date2num(task['start'])
-            end_date = mdates.date2num(task['end'])
-            duration = end_date - start_date
-            task_name = persian_text(task['name'])
-
-            bar = self.ax.barh(
-                task_name,
-                duration,
-                left=start_date,
-                height=0.6,
-                color=task['color'],
-                edgecolor='black',
-                alpha=0.8
-            )
-
-            mid_point = start_date + duration / 2
-            duration_text = persian_text(f"{task['duration']} روز")
-            self.ax.text(
-                mid_point, i,
-                duration_text,
-                ha='center', va='center',
-                color='black',
-                fontsize=36,
-                fontweight='bold'
-            )
-
-        all_dates = [task['start'] for task in self.tasks] + [task['end'] for task in self.tasks]
-        min_date_gregorian = min(all_dates)
-        max_date_gregorian = max(all_dates)
-        min_date_shamsi = jdt.datetime.fromgregorian(date=min_date_gregorian)
-        max_date_shamsi = jdt.datetime.fromgregorian(date=max_date_gregorian)
-        total_days_shamsi = (max_date_shamsi - min_date_shamsi).days + 1
-
-        self.ax.xaxis_date()
-        self.ax.set_axisbelow(True)
-        self.ax.yaxis.set_label_position("right")
-        self.ax.yaxis.tick_right()
-
-        if total_days_shamsi <= 8:
-            self.ax.xaxis.set_major_locator(mdates.DayLocator())
-            self.ax.xaxis.set_major_formatter(plt.FuncFormatter(
-                lambda x, _: persian_text(jdt.datetime.fromgregorian(date=mdates.num2date(x)).strftime("%A"))
-            ))
-            self.ax.text(mdates.date2num(min_date_gregorian), -1.5,
-                         persian_text(min_date_shamsi.strftime("%b %Y")),
-                         ha='left', va='top')
-            self.ax.text(mdates.date2num(max_date_gregorian), -1.5,
-                         persian_text(max_date_shamsi.strftime("%b %Y")),
-                         ha='right', va='top')
-        elif total_days_shamsi <= 32:
-            self.ax.xaxis.set_major_locator(mdates.MonthLocator())
-            self.ax.xaxis.set_major_formatter(plt.FuncFormatter(
-                lambda x, _: persian_text(jdt.datetime.fromgregorian(date=mdates.num2date(x)).strftime("%b"))
-            ))
-            self.ax.xaxis.set_minor_locator(mdates.WeekdayLocator(byweekday=mdates.MO))
-            self.ax.xaxis.set_minor_formatter(plt.FuncFormatter(
-                lambda x, _: persian_text(jdt.datetime.fromgregorian(date=mdates.num2date(x)).strftime("%d"))
-            ))
+        if self.chart:
+            self.refresh_chart()
         else:
-            self.ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-            self.ax.xaxis.set_major_formatter(plt.FuncFormatter(
-                lambda x, _: persian_text(jdt.datetime.fromgregorian(date=mdates.num2date(x)).strftime("%Y-%m-%d"))
-            ))
-            plt.xticks(rotation=45, ha='right')
-
-        self.ax.spines['top'].set_visible(False)
-        self.ax.spines['right'].set_visible(False)
-        self.ax.spines['left'].set_visible(False)
-        self.ax.set_title(persian_text('نمودار گانت پروژه'), pad=20, fontsize=14, fontweight='bold', loc='right')
-        self.ax.set_xlabel(persian_text('زمان'), labelpad=10, loc='left')
-        plt.tight_layout()
-        self.figure.patch.set_facecolor('white')
-        self.ax.set_facecolor('white')
-
-        for label in self.ax.get_yticklabels():
-            label.set_ha('right')
-            label.set_position((1, 0))
+            with profiler.span('snapshot', tasks=len(self.tasks)):
+                tasks, resources = self.tasks.snapshot(), self.resources.snapshot()
+            self.chart_worker.submit(render_chart, self.on_chart_rendered, tasks, None, resources,
+                                     self.tree.snapshot(tasks), self.chart_size())
+
+        min_ordinal, max_ordinal = self.index.extent()
+        if max_ordinal - min_ordinal < PRECOMPUTE_MAX_DAYS:
+            precompute_labels(min_ordinal, max_ordinal, (CURSOR_LABEL_FORMAT,))
+
+    def chart_size(self):
+        # the figure is drawn at the size of the chart frame, which Tk knows once the tab has been shown
+        import matplotlib
+        from gantt_render import VIEW_SIZE
+        self.chart_frame.update_idletasks()
+        width, height = self.chart_frame.winfo_width(), self.chart_frame.winfo_height()
+        if width < 100 or height < 100:
+            return VIEW_SIZE
+        dpi = matplotlib.rcParams['figure.dpi']
+        return width / dpi, height / dpi
+
+    def on_chart_rendered(self, chart, error):
+        if error is not None:
+            self.show_error(f"خطا در تولید نمودار: {str(error)}")
+            return
+        if self.chart or not self.tasks:
+            return
 
+        # tasks added or removed while the worker was busy are applied as a diff
+        chart.tasks = self.tasks
+        chart.tree = self.tree
+        chart.index = self.index
+        chart.resources = self.resources
+        with profiler.span('apply diff'):
+            chart.update()
+            chart.set_highlight(self.critical_highlight())
+        self.chart = chart
+        self.figure, self.ax = chart.figure, chart.ax
+
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         self.canvas = FigureCanvasTkAgg(self.figure, master=self.chart_frame)
-        self.canvas.draw()
+        with profiler.span('canvas draw', caches=True):
+            self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
         self.canvas.mpl_connect('button_press_event', self.on_click)
         self.canvas.mpl_connect('motion_notify_event', self.on_motion)
         self.canvas.mpl_connect('button_release_event', self.on_release)
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        self.canvas.mpl_connect('scroll_event', self.on_scroll)
 
         if hasattr(self, 'chart_placeholder'):
             self.chart_placeholder.pack_forget()
 
+    def show_progress(self, fraction, phase):
+        if fraction is None:
+            if self.chart_worker.active is None and self.export_worker.active is None:
+                self.progress_frame.pack_forget()
+            return
+        self.progress_frame.pack(side="left", padx=5, pady=5)
+        self.progress_bar.set(fraction)
+        self.progress_label.configure(text=PHASE_LABELS.get(phase, phase))
+
+    def cancel_rendering(self):
+        self.chart_worker.cancel()
+        self.export_worker.cancel()
+
+    def refresh_chart(self):
+        if self.chart:
+            with profiler.span('refresh'):
+                self.chart.update()
+                self.chart.set_highlight(self.critical_highlight())
+            self.canvas.draw_idle()
+
+    def close_chart(self):
+        if self.canvas:
+            self.canvas.get_tk_widget().destroy()
+            self.canvas = None
+            self.figure = None
+            self.ax = None
+            self.chart = None
+            self.reset_vline()
+        if hasattr(self, 'chart_placeholder'):
+            self.chart_placeholder.pack(expand=True)
+
+    def toggle_task(self, task):
+        self.tree.toggle(task['id'])
+        self.task_list.refresh()
+        self.refresh_chart()
+
     def on_click(self, event):
         if event.inaxes != self.ax:
             return
 
-        if self.current_vline:
-            self.current_vline.remove()
-            if self.vline_text:
-                self.vline_text.remove()
-
-        self.current_vline = self.ax.axvline(x=event.xdata, color='red', linestyle='--', linewidth=1)
-        greg_date = mdates.num2date(event.xdata)
-        shamsi_date = jdt.datetime.fromgregorian(date=greg_date)
-        date_str = shamsi_date.strftime("%Y-%m-%d")
-
-        self.vline_text = self.ax.text(
-            event.xdata, 0.98,
-            persian_text(f"تاریخ: {date_str}"),
-            transform=self.ax.get_xaxis_transform(),
-            ha='center', va='top',
-            bbox=dict(boxstyle='round,pad=0.5', fc='white', alpha=0.8)
-        )
+        if event.dblclick:
+            # double click on a summary bar expands or collapses it
+            row = round(event.ydata)
+            if 0 <= row < len(self.chart.row_ids) and self.tree.is_summary(int(self.chart.row_ids[row])):
+                self.toggle_task(self.tasks.get(int(self.chart.row_ids[row])))
+                return
+
+        if self.current_vline is None:
+            self.current_vline = self.ax.axvline(x=event.xdata, color='red', linestyle='--', linewidth=1,
+                                                 animated=True)
+            self.vline_text = self.ax.text(
+                event.xdata, 0.98, "",
+                transform=self.ax.get_xaxis_transform(),
+                ha='center', va='top',
+                bbox=dict(boxstyle='round,pad=0.5', fc='white', alpha=0.8),
+                animated=True
+            )
+            self.canvas.draw()
 
         self.dragging_vline = True
-        self.canvas.draw()
+        self.pending_vline_x = event.xdata
+        self.flush_vline()
 
     def on_motion(self, event):
         if not self.dragging_vline or event.inaxes != self.ax:
             return
 
-        if self.current_vline:
-            self.current_vline.set_xdata([event.xdata, event.xdata])
-            greg_date = mdates.num2date(event.xdata)
-            shamsi_date = jdt.datetime.fromgregorian(date=greg_date)
-            date_str = shamsi_date.strftime("%Y-%m-%d")
+        self.pending_vline_x = event.xdata
+        if self.motion_job is None:
+            self.motion_job = self.root.after(MOTION_INTERVAL_MS, self.flush_vline)
 
-            if self.vline_text:
-                self.vline_text.set_text(persian_text(f"تاریخ: {date_str}"))
-                self.vline_text.set_x(event.xdata)
+    def on_scroll(self, event):
+        if event.inaxes != self.ax:
+            return
 
-            self.canvas.draw()
+        scale = 1 / ZOOM_STEP if event.button == 'up' else ZOOM_STEP
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        self.ax.set_xlim(event.xdata - (event.xdata - x0) * scale, event.xdata + (x1 - event.xdata) * scale)
+        self.ax.set_ylim(event.ydata - (event.ydata - y0) * scale, event.ydata + (y1 - event.ydata) * scale)
+        self.canvas.draw_idle()
 
     def on_release(self, event):
+        if self.dragging_vline:
+            self.flush_vline()
         self.dragging_vline = False
 
+    def on_draw(self, event):
+        profiler.count('canvas draws')
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_vline()
+
+    def flush_vline(self):
+        if self.motion_job is not None:
+            self.root.after_cancel(self.motion_job)
+            self.motion_job = None
+        if self.current_vline is None or self.pending_vline_x is None:
+            return
+
+        x = self.pending_vline_x
+        self.pending_vline_x = None
+        with profiler.span('cursor', blit=self.background is not None):
+            self.current_vline.set_xdata([x, x])
+            self.vline_text.set_text(self.cursor_label(num_to_ordinal(x)))
+            self.vline_text.set_x(x)
+
+            if self.background is None:
+                self.canvas.draw()
+                return
+            self.canvas.restore_region(self.background)
+            self.draw_vline()
+            self.canvas.blit(self.figure.bbox)
+
+    def cursor_label(self, ordinal):
+        label = persian_label(ordinal, CURSOR_LABEL_FORMAT)
+        active = self.index.stab(ordinal)
+        if not len(active):
+            return label
+        if len(active) <= CURSOR_MAX_NAMES:
+            names = "، ".join(self.tasks.names[self.tasks.name_ids[task_id]] for task_id in active.tolist())
+            return f"{label}\n{persian_text(names)}"
+        return f"{label}\n{persian_text(f'{len(active)} تسک فعال')}"
+
+    def draw_vline(self):
+        if self.current_vline is not None:
+            self.ax.draw_artist(self.current_vline)
+            self.ax.draw_artist(self.vline_text)
+
+    def reset_vline(self):
+        if self.motion_job is not None:
+            self.root.after_cancel(self.motion_job)
+        self.current_vline = None
+        self.vline_text = None
+        self.dragging_vline = False
+        self.pending_vline_x = None
+        self.motion_job = None
+        self.background = None
+
     def export_chart(self):
         if not self.figure:
             self.show_error("نموداری برای ذخیره وجود ندارد. لطفا ابتدا نمودار تولید کنید.")
             return
 
         from tkinter import filedialog
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=".png",
-            filetypes=[("PNG files", "*.png"), ("All files", "*.*")],
-            title="ذخیره نمودار به عنوان PNG"
-        )
+        from gantt_render import render_to_file
+        paged = len(self.tree.visible()[0]) > PAGED_EXPORT_TASKS
+        if paged:
+            # a large project is saved page by page; PDF keeps it in one file, so it is offered first
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=".pdf",
+                filetypes=[("PDF files", "*.pdf"), ("PNG pages (folder)", "*.png"), ("All files", "*.*")],
+                title=f"ذخیره نمودار: بیش از {PAGED_EXPORT_TASKS} تسک؛ PDF چندصفحه‌ای، یا پوشه‌ی <نام>_pages از صفحه‌های PNG"
+            )
+        else:
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=".png",
+                filetypes=[("PNG files", "*.png"), ("PDF files", "*.pdf"), ("All files", "*.*")],
+                title="ذخیره نمودار به عنوان PNG"
+            )
 
-        if file_path:
-            try:
-                self.figure.savefig(file_path, dpi=300, bbox_inches='tight', facecolor='white')
-                self.show_info(f"نمودار با موفقیت ذخیره شد:\n{file_path}")
-            except Exception as e:
-                self.show_error(f"خطا در ذخیره نمودار: {str(e)}")
+        if not file_path:
+            return
+        # the export shows the rows the task list shows: same hierarchy, same collapsed summaries
+        tasks = self.tasks.snapshot()
+        tree = self.tree.snapshot(tasks)
+        if paged:
+            # one bitmap of a large project would need gigabytes; write it page by page instead
+            from tiled_export import export_pages
+            if file_path.lower().endswith(".pdf"):
+                export = partial(export_pages, mode="pdf", highlight=self.critical_highlight(), tree=tree)
+            else:
+                file_path = os.path.splitext(file_path)[0] + "_pages"
+                export = partial(export_pages, mode="png", jobs=os.cpu_count(), highlight=self.critical_highlight(),
+                                 tree=tree)
+        else:
+            export = partial(render_to_file, highlight=self.critical_highlight(), resources=self.resources.snapshot(),
+                             tree=tree)
+        self.export_worker.submit(export, self.on_export_done, tasks, file_path)
+
+    def on_export_done(self, file_path, error):
+        if error is not None:
+            self.show_error(f"خطا در ذخیره نمودار: {str(error)}")
+        else:
+            self.show_info(f"نمودار با موفقیت ذخیره شد:\n{file_path}")
 
     def clear_all(self):
-        self.tasks = []
-        for widget in self.tasks_frame.winfo_children():
-            widget.destroy()
-        if self.canvas:
-            self.canvas.get_tk_widget().destroy()
-            plt.close(self.figure)
-            self.canvas = None
-            self.figure = None
-            self.current_vline = None
-            self.vline_text = None
-            self.dragging_vline = False
-        if hasattr(self, 'chart_placeholder'):
-            self.chart_placeholder.pack(expand=True)
+        if self.importer:
+            self.importer.cancel()
+        self.chart_worker.cancel()
+        if self.project:
+            self.project.close()
+            self.project = None
+        self.tasks.clear()
+        self.reset_schedule()
+        self.index = IntervalIndex(self.tasks)
+        self.resources = ResourcePool()
+        self.finish_editing()
+        self.task_list.set_tasks(self.tasks, self.tree)
+        self.close_chart()
 
     def show_error(self, message):
         dialog = ctk.CTkToplevel(self.root)
@@ -502,4 +890,5 @@ class GanttChartApp:
 if __name__ == "__main__":
     root = ctk.CTk()
     app = GanttChartApp(root)
+    root.after_idle(startup.mark, "first frame")
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,177 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import jdatetime as jdt
+
+from color_names import COLOR_MAP
+from gantt_render import render_to_file
+from hierarchy import TaskTree
+from project_file import SUFFIX, ProjectFile
+from resources import ResourcePool
+from scheduling import Schedule
+from task_import import CHUNK_READERS, import_file
+from task_store import TaskStore
+from tiled_export import ROWS_PER_PAGE, export_pages
+
+PROJECT_SUFFIXES = (".json", SUFFIX) + tuple(CHUNK_READERS)
+FORMATS = ("png", "svg", "pdf", "pyramid")
+
+
+def load_project(path):
+    # (tasks, render options); only project files carry a hierarchy, which is rendered fully
+    # expanded, dependencies, whose critical path is highlighted the same as in the app, and
+    # resources, drawn as the load panel
+    if path.endswith(SUFFIX):
+        project, tasks = ProjectFile.open(path)
+        tree = TaskTree(tasks)
+        project.restore_tree(tree)
+        options = {}
+        if len(tree):
+            tree.expand_all()
+            options["tree"] = tree
+        if len(project.edge_keys):
+            schedule = Schedule(tasks, on_commit=tree.rollup, summaries=tree.is_summary)
+            tree.on_rollup = schedule.reload
+            project.restore_dependencies(schedule)
+            options["highlight"] = schedule.critical()
+        if project.resource_names:
+            pool = ResourcePool()
+            project.restore_resources(pool)
+            options["resources"] = pool
+        return tasks, options
+    if not path.endswith(".json"):
+        tasks = TaskStore()
+        report = import_file(path, tasks)
+        if report.error_count:
+            raise ValueError(f"{path}:\n{report.summary()}")
+        return tasks, {}
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    tasks = TaskStore()
+    for name, start, end, color in parse_tasks(data, path):
+        tasks.append(name, start, end, color)
+    return tasks, {}
+
+
+def parse_tasks(data, source):
+    # a JSON task list (or {"tasks": [...]}) as (name, start, end, color) with Gregorian ordinals;
+    # the shape is checked field by field, so a bad payload is reported by the field that failed
+    if isinstance(data, dict):
+        if "tasks" not in data:
+            raise ValueError(f"{source}: فیلد tasks وجود ندارد")
+        data = data["tasks"]
+    if not isinstance(data, list):
+        raise ValueError(f"{source}: فیلد tasks باید فهرستی از تسک‌ها باشد")
+    rows = []
+    for number, item in enumerate(data, 1):
+        if not isinstance(item, dict):
+            raise ValueError(f"{source}: تسک {number}: هر تسک باید یک شیء JSON باشد")
+        name = item.get("name")
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError(f"{source}: تسک {number}: فیلد name باید متنی غیرخالی باشد")
+        dates = []
+        for field in ("start", "end"):
+            value = item.get(field)
+            if not isinstance(value, str):
+                raise ValueError(f"{source}: تسک {number}: فیلد {field} باید تاریخی به شکل 1403-01-15 باشد")
+            try:
+                dates.append(jdt.datetime.strptime(value, "%Y-%m-%d").togregorian())
+            except ValueError:
+                raise ValueError(f"{source}: تسک {number}: فیلد {field} تاریخ نامعتبر است: {value}")
+        start, end = dates
+        if end < start:
+            raise ValueError(f"{source}: تسک {number}: تاریخ پایان نمی‌تواند قبل از تاریخ شروع باشد")
+        color = item.get("color", "آبی")
+        if not isinstance(color, str):
+            raise ValueError(f"{source}: تسک {number}: فیلد color باید متن باشد")
+        rows.append((name, start.toordinal(), end.toordinal(), COLOR_MAP.get(color, color)))
+    return rows
+
+
+def find_projects(input_dir):
+    return sorted(
+        os.path.join(input_dir, name)
+        for name in os.listdir(input_dir)
+        if name.endswith(PROJECT_SUFFIXES)
+    )
+
+
+def render_project(path, output_dir, formats, dpi, rows_per_page=0, page_jobs=1):
+    tasks, options = load_project(path)
+    # the page exports have no load panel
+    page_options = {key: value for key, value in options.items() if key != "resources"}
+    if not tasks:
+        raise ValueError(f"{path}: تسکی برای نمایش وجود ندارد")
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    outputs = []
+    for fmt in formats:
+        if fmt == "pyramid":
+            output = export_pages(tasks, os.path.join(output_dir, f"{stem}_tiles"), "pyramid",
+                                  rows_per_page or ROWS_PER_PAGE, dpi, page_jobs, **page_options)
+        elif rows_per_page and fmt == "png":
+            output = export_pages(tasks, os.path.join(output_dir, f"{stem}_pages"), "png", rows_per_page, dpi, page_jobs,
+                                  **page_options)
+        elif rows_per_page and fmt == "pdf":
+            output = export_pages(tasks, os.path.join(output_dir, f"{stem}.pdf"), "pdf", rows_per_page, dpi, **page_options)
+        else:
+            output = os.path.join(output_dir, f"{stem}.{fmt}")
+            render_to_file(tasks, output, dpi=dpi, **options)
+        outputs.append(output)
+    return outputs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render Persian Gantt charts for every project file in a directory.")
+    parser.add_argument("input_dir")
+    parser.add_argument("-o", "--output-dir", default=".")
+    parser.add_argument("-f", "--format", dest="formats", nargs="+", choices=FORMATS, default=["png"])
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of worker processes (0 = one per CPU core)")
+    parser.add_argument("--rows-per-page", type=int, default=0,
+                        help="export PNG/PDF as pages of this many rows instead of one image (0 = one image)")
+    args = parser.parse_args(argv)
+
+    projects = find_projects(args.input_dir)
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = args.jobs or os.cpu_count()
+
+    failed = 0
+    if jobs == 1 or len(projects) == 1:
+        # a single project spends the worker processes on its pages instead
+        results = []
+        for path in projects:
+            try:
+                results.append((path, render_project(path, args.output_dir, args.formats, args.dpi,
+                                                     args.rows_per_page, jobs), None))
+            except Exception as e:
+                results.append((path, None, e))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [(path, pool.submit(render_project, path, args.output_dir, args.formats, args.dpi,
+                                          args.rows_per_page))
+                       for path in projects]
+            results = []
+            for path, future in futures:
+                try:
+                    results.append((path, future.result(), None))
+                except Exception as e:
+                    results.append((path, None, e))
+
+    for path, outputs, error in results:
+        if error is not None:
+            failed += 1
+            print(f"Error rendering {path}: {error}", file=sys.stderr)
+        else:
+            print(f"{path} -> {', '.join(outputs)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
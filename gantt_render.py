@@ -0,0 +1,579 @@
+import dataclasses
+import json
+import os
+import time
+
+import matplotlib
+import matplotlib.dates as mdates
+import matplotlib.font_manager as fm
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PathCollection
+from matplotlib.colors import to_rgba_array
+from matplotlib.figure import Figure
+from matplotlib.image import AxesImage
+from matplotlib.path import Path
+from matplotlib.transforms import Bbox
+from matplotlib.ticker import FixedLocator, FuncFormatter, MaxNLocator, NullLocator
+
+from interval_index import IntervalIndex
+from profiler import profiler
+from resources import ResourceLoad
+from persian_calendar import EPOCH_ORDINAL, num_to_ordinal, ordinal_to_num, persian_label, persian_text
+
+FONT_PATH = "B-NAZANIN.TTF"
+FONT_CACHE_FILE = "gantt_persian_fonts.json"
+VIEW_SIZE = (12, 8)
+BAR_HEIGHT = 0.6
+MAX_BAR_LABELS = 200
+MAX_ROW_LABELS = 60
+MIN_ROW_PIXELS = 2
+MIN_LABEL_ROW_PIXELS = 12
+DENSITY_CELL_PIXELS = 2
+INDEXED_CULL_ROWS = 4096
+CRITICAL_EDGE_COLOR = (0.8, 0.0, 0.0, 1.0)
+CRITICAL_LINEWIDTH = 2.5
+LOAD_HEIGHT_RATIO = 0.25
+LOAD_COLOR = '#3B8ED0'
+SUMMARY_BAR_HEIGHT = 0.3
+SUMMARY_COLOR = (0.2, 0.2, 0.2, 0.9)
+INDENT = "    "
+BAR_CODES = np.array([Path.MOVETO, Path.LINETO, Path.LINETO, Path.LINETO, Path.CLOSEPOLY], dtype=Path.code_type)
+
+
+def no_check(fraction, phase):
+    pass
+
+
+def register_font(font_path):
+    # the parsed font entries are kept in matplotlib's cache dir, so later runs skip FT2Font
+    path = os.path.abspath(font_path)
+    stat = os.stat(path)
+    key = f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+    cache_path = os.path.join(matplotlib.get_cachedir(), FONT_CACHE_FILE)
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    entries = cache.get(key)
+    if entries:
+        fm.fontManager.ttflist.extend(fm.FontEntry(**entry) for entry in entries)
+        fm.fontManager._findfont_cached.cache_clear()
+        return entries[0]['name']
+
+    first = len(fm.fontManager.ttflist)
+    fm.fontManager.addfont(path)
+    entries = [dataclasses.asdict(entry) for entry in fm.fontManager.ttflist[first:]]
+    cache = {k: v for k, v in cache.items() if not k.startswith(f"{path}:")}
+    cache[key] = entries
+    try:
+        with open(cache_path + ".part", "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(cache_path + ".part", cache_path)
+    except OSError:
+        pass
+    return entries[0]['name']
+
+
+def setup_font(font_path=FONT_PATH):
+    try:
+        matplotlib.rcParams['font.family'] = register_font(font_path)
+        matplotlib.rcParams['axes.unicode_minus'] = False
+    except Exception as e:
+        print(f"Error loading font: {e}")
+
+
+setup_font()
+
+
+def tick_formatter(fmt):
+    def format_tick(x, _):
+        if not profiler.enabled:
+            return persian_label(num_to_ordinal(x), fmt)
+        t0 = time.perf_counter()
+        label = persian_label(num_to_ordinal(x), fmt)
+        profiler.add_time('tick labels', time.perf_counter() - t0)
+        return label
+    return FuncFormatter(format_tick)
+
+
+def date_axis_mode(min_ordinal, max_ordinal):
+    total_days_shamsi = max_ordinal - min_ordinal + 1
+    if total_days_shamsi <= 8:
+        return 'day'
+    if total_days_shamsi <= 32:
+        return 'month'
+    return 'auto'
+
+
+def format_date_axis(ax, min_ordinal, max_ordinal):
+    mode = date_axis_mode(min_ordinal, max_ordinal)
+    texts = []
+
+    ax.xaxis_date()
+    ax.set_axisbelow(True)
+    ax.yaxis.set_label_position("right")
+    ax.yaxis.tick_right()
+    ax.xaxis.set_minor_locator(NullLocator())
+
+    if mode == 'day':
+        ax.xaxis.set_major_locator(mdates.DayLocator())
+        ax.xaxis.set_major_formatter(tick_formatter("%A"))
+        texts.append(ax.text(ordinal_to_num(min_ordinal), -1.5,
+                             persian_label(min_ordinal, "%b %Y"),
+                             ha='left', va='top'))
+        texts.append(ax.text(ordinal_to_num(max_ordinal), -1.5,
+                             persian_label(max_ordinal, "%b %Y"),
+                             ha='right', va='top'))
+    elif mode == 'month':
+        ax.xaxis.set_major_locator(mdates.MonthLocator())
+        ax.xaxis.set_major_formatter(tick_formatter("%b"))
+        ax.xaxis.set_minor_locator(mdates.WeekdayLocator(byweekday=mdates.MO))
+        ax.xaxis.set_minor_formatter(tick_formatter("%d"))
+    else:
+        ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+        ax.xaxis.set_major_formatter(tick_formatter("%Y-%m-%d"))
+
+    rotate_date_labels(ax, mode)
+    return mode, texts
+
+
+def rotate_date_labels(ax, mode):
+    rotation, ha = (45, 'right') if mode == 'auto' else (0, 'center')
+    for label in ax.get_xticklabels():
+        label.set_rotation(rotation)
+        label.set_ha(ha)
+
+
+def style_axes(ax):
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_visible(False)
+    ax.set_title(persian_text('نمودار گانت پروژه'), pad=20, fontsize=14, fontweight='bold', loc='right')
+    ax.set_xlabel(persian_text('زمان'), labelpad=10, loc='left')
+    ax.figure.patch.set_facecolor('white')
+    ax.set_facecolor('white')
+
+
+def layout(ax, margins=None):
+    with profiler.span('layout'):
+        if margins is None:
+            ax.figure.tight_layout()
+        else:
+            ax.figure.subplots_adjust(**margins)
+    for label in ax.get_yticklabels():
+        label.set_ha('right')
+        label.set_position((1, 0))
+
+
+def figure_size(rows):
+    # the full-height figure of an export, in inches
+    return 12, max(4, rows * 0.6)
+
+
+class GanttChart:
+    def __init__(self, tasks, figsize=None, check=no_check, lod=True, highlight=None, resources=None,
+                 date_range=None, margins=None, tree=None):
+        check(0.0, 'figure')
+        self.tasks = tasks
+        # with a tree only the visible rows of the hierarchy get bars; collapsed subtrees cost nothing
+        self.tree = tree
+        self.tree_version = None
+        # pages of one export share the project's date range and fixed margins so their axes line up
+        self.fixed_date_range = date_range
+        self.margins = margins
+        self.lod = lod
+        self.highlight = highlight
+        self.resources = resources
+        self.load_ax = None
+        self.load_key = None
+        self.load_artists = []
+        self.edits = tasks.edits
+        self.index = IntervalIndex(tasks)
+        self.updating = False
+        with profiler.span('figure'):
+            rows = len(tasks) if tree is None else len(tree.visible()[0])
+            self.figure = Figure(figsize=figsize or figure_size(rows))
+            FigureCanvasAgg(self.figure)
+            self.ax = self.figure.add_subplot()
+            self.figure.subplots_adjust(right=0.9)
+
+        self.row_ids = np.empty(0, dtype=np.intp)
+        # row of every task id, -1 for tasks without a row (removed, or inside a collapsed summary)
+        self.row_of = np.empty(0, dtype=np.intp)
+        self.row_depths = np.empty(0, dtype=np.int32)
+        self.row_starts = np.empty(0)
+        self.row_ends = np.empty(0)
+        self.row_name_ids = np.empty(0, dtype=np.int32)
+        self.row_colors = np.empty((0, 4))
+        # bar corners of every row in one buffer; Path objects are only made for the rows being drawn
+        self.verts = np.empty((0, 5, 2))
+        self.bars = PathCollection([], edgecolors='black', linewidths=1)
+        self.ax.add_collection(self.bars)
+        self.density = AxesImage(self.ax, cmap='Blues', interpolation='nearest', origin='lower', visible=False)
+        self.density.set_data(np.zeros((1, 1)))
+        self.ax.add_image(self.density)
+        self.detail = True
+        self.bar_labels = {}
+        self.date_range = None
+        self.axis_mode = None
+        self.axis_texts = []
+        self.ax.yaxis.set_major_formatter(FuncFormatter(self.row_label))
+
+        style_axes(self.ax)
+        check(0.1, 'bars')
+        self.update()
+        self.ax.callbacks.connect('xlim_changed', self.on_limits_changed)
+        self.ax.callbacks.connect('ylim_changed', self.on_limits_changed)
+
+    def row_label(self, y, _):
+        row = int(y)
+        if row != y or not 0 <= row < len(self.row_name_ids):
+            return ""
+        if not profiler.enabled:
+            return persian_text(self.row_name(row))
+        t0 = time.perf_counter()
+        label = persian_text(self.row_name(row))
+        profiler.add_time('row labels', time.perf_counter() - t0)
+        return label
+
+    def row_name(self, row):
+        name = self.tasks.names[self.row_name_ids[row]]
+        if self.tree is None:
+            return name
+        task_id = int(self.row_ids[row])
+        if self.tree.is_summary(task_id):
+            name = f"{'▾' if task_id in self.tree.expanded else '▸'} {name}"
+        return INDENT * int(self.row_depths[row]) + name
+
+    def artist_counts(self):
+        return {
+            'bars': len(self.bars.get_paths()) if self.bars.get_visible() else 0,
+            'bar labels': len(self.bar_labels),
+            'texts': len(self.ax.texts),
+            'density': not self.detail,
+            'load artists': len(self.load_artists),
+        }
+
+    def visible_ids(self):
+        if self.tree is None:
+            ids = self.tasks.ids()
+            return ids, None
+        return self.tree.visible()
+
+    def update(self):
+        if self.index.tasks is not self.tasks:
+            self.index = IntervalIndex(self.tasks)
+        ids, depths = self.visible_ids()
+        edited = self.tasks.edits != self.edits
+        regrouped = self.tree is not None and self.tree.version != self.tree_version
+        loaded = self.update_load()
+        if not edited and not regrouped and np.array_equal(ids, self.row_ids):
+            if loaded:
+                layout(self.ax, self.margins)
+            return loaded
+        self.edits = self.tasks.edits
+        self.tree_version = None if self.tree is None else self.tree.version
+
+        keep = np.isin(self.row_ids, ids, assume_unique=True)
+        kept = self.row_ids[keep]
+        if regrouped or not np.array_equal(ids[:len(kept)], kept):
+            # only appended rows are cheap; rows landing in the middle, or a changed
+            # hierarchy (summary bars look different), need a rebuild
+            keep[:] = False
+            kept = kept[:0]
+        removed = self.row_ids[~keep]
+        added = ids[len(kept):]
+        with profiler.span('rows', removed=len(removed), added=len(added), edited=edited):
+            if len(removed):
+                self.remove_rows(keep)
+            if edited:
+                self.update_dates()
+            if len(added):
+                self.append_rows(added, None if depths is None else depths[len(kept):])
+
+        n = len(self.row_ids)
+        self.row_of = np.full(self.tasks.size, -1, dtype=np.intp)
+        self.row_of[self.row_ids] = np.arange(n)
+        self.updating = True
+        self.ax.set_ylim(-0.5, n - 0.5)
+        if n <= MAX_ROW_LABELS:
+            self.ax.yaxis.set_major_locator(FixedLocator(np.arange(n)))
+        else:
+            self.ax.yaxis.set_major_locator(MaxNLocator(nbins=MAX_ROW_LABELS, integer=True))
+
+        with profiler.span('date axis'):
+            relayout = self.update_date_axis()
+        if relayout or loaded:
+            layout(self.ax, self.margins)
+        self.updating = False
+        self.refresh_detail()
+        return True
+
+    def remove_rows(self, keep):
+        kept = self.verts[:len(keep)][keep]
+        kept[:, :, 1] -= np.cumsum(~keep)[keep][:, None]
+        self.verts[:len(kept)] = kept
+        self.row_ids = self.row_ids[keep]
+        self.row_depths = self.row_depths[keep]
+        self.row_starts = self.row_starts[keep]
+        self.row_ends = self.row_ends[keep]
+        self.row_name_ids = self.row_name_ids[keep]
+        self.row_colors = self.row_colors[keep]
+
+    def append_rows(self, ids, depths=None):
+        first = len(self.row_ids)
+        rows = np.arange(first, first + len(ids))
+        starts = (self.tasks.starts[ids] - EPOCH_ORDINAL).astype(float)
+        ends = (self.tasks.ends[ids] - EPOCH_ORDINAL).astype(float)
+        summary = np.zeros(len(ids), dtype=bool) if self.tree is None else self.tree.is_summary(ids)
+        heights = np.where(summary, SUMMARY_BAR_HEIGHT, BAR_HEIGHT)
+
+        if first + len(ids) > len(self.verts):
+            grown = np.empty((max(first + len(ids), 2 * len(self.verts)), 5, 2))
+            grown[:first] = self.verts[:first]
+            self.verts = grown
+        verts = self.verts[first:first + len(ids)]
+        verts[:, 0, 0] = verts[:, 1, 0] = verts[:, 4, 0] = starts
+        verts[:, 2, 0] = verts[:, 3, 0] = ends
+        verts[:, 0, 1] = verts[:, 3, 1] = verts[:, 4, 1] = rows - heights / 2
+        verts[:, 1, 1] = verts[:, 2, 1] = rows + heights / 2
+
+        self.row_ids = np.concatenate([self.row_ids, ids])
+        self.row_depths = np.concatenate([self.row_depths, np.zeros(len(ids), dtype=np.int32) if depths is None else depths])
+        self.row_starts = np.concatenate([self.row_starts, starts])
+        self.row_ends = np.concatenate([self.row_ends, ends])
+        self.row_name_ids = np.concatenate([self.row_name_ids, self.tasks.name_ids[ids]])
+        colors = to_rgba_array(self.tasks.palette, alpha=0.8)[self.tasks.colors[ids]]
+        colors[summary] = SUMMARY_COLOR
+        self.row_colors = np.concatenate([self.row_colors, colors])
+
+    def add_load_axes(self):
+        grid = self.figure.add_gridspec(2, 1, height_ratios=(1 - LOAD_HEIGHT_RATIO, LOAD_HEIGHT_RATIO))
+        self.ax.set_subplotspec(grid[0])
+        self.load_ax = self.figure.add_subplot(grid[1], sharex=self.ax)
+        self.ax.tick_params(axis='x', which='both', labelbottom=False)
+        self.ax.set_xlabel('')
+        self.load_ax.set_xlabel(persian_text('زمان'), labelpad=10, loc='left')
+        self.load_ax.set_ylabel(persian_text('بار منابع'))
+        self.load_ax.yaxis.set_label_position('right')
+        self.load_ax.yaxis.tick_right()
+        self.load_ax.spines['top'].set_visible(False)
+        self.load_ax.spines['left'].set_visible(False)
+        rotate_date_labels(self.load_ax, self.axis_mode)
+
+    def update_load(self):
+        # total allocated units per day, with over-allocated days shaded red
+        pool = self.resources
+        if pool is None or not len(pool):
+            return False
+        key = (id(pool), pool.version, self.tasks.edits, self.tasks.size, self.tasks.count)
+        if key == self.load_key:
+            return False
+        self.load_key = key
+        with profiler.span('load'):
+            return self.draw_load(pool)
+
+    def draw_load(self, pool):
+        added = self.load_ax is None
+        if added:
+            self.add_load_axes()
+
+        load = ResourceLoad(self.tasks, pool)
+        days, totals = load.total()
+        over_days, over_counts = load.overloaded_days()
+        for artist in self.load_artists:
+            artist.remove()
+        self.load_artists = [self.load_ax.fill_between(days - EPOCH_ORDINAL, totals, step='post',
+                                                       color=LOAD_COLOR, alpha=0.6, linewidth=0)]
+        spans = [(day - EPOCH_ORDINAL, next_day - day)
+                 for day, next_day, count in zip(over_days.tolist(), over_days[1:].tolist(), over_counts.tolist())
+                 if count > 0]
+        if spans:
+            self.load_artists.append(self.load_ax.broken_barh(spans, (0, 1), color='red', alpha=0.25,
+                                                              transform=self.load_ax.get_xaxis_transform()))
+        self.load_ax.set_ylim(0, max(1.0, float(totals.max()) * 1.1 if len(totals) else 1.0))
+        return added
+
+    def update_dates(self):
+        starts = (self.tasks.starts[self.row_ids] - EPOCH_ORDINAL).astype(float)
+        ends = (self.tasks.ends[self.row_ids] - EPOCH_ORDINAL).astype(float)
+        changed = np.flatnonzero((starts != self.row_starts) | (ends != self.row_ends))
+        for corner in (0, 1, 4):
+            self.verts[changed, corner, 0] = starts[changed]
+        for corner in (2, 3):
+            self.verts[changed, corner, 0] = ends[changed]
+        self.row_starts = starts
+        self.row_ends = ends
+        for task_id in self.row_ids[changed].tolist():
+            label = self.bar_labels.pop(task_id, None)
+            if label is not None:
+                label.remove()
+
+    def set_highlight(self, highlight):
+        self.highlight = highlight
+        self.refresh_detail()
+
+    def row_edges(self, rows):
+        if self.highlight is None:
+            return 'black', 1
+        ids = self.row_ids[rows]
+        critical = np.zeros(len(ids), dtype=bool)
+        known = ids < len(self.highlight)
+        critical[known] = self.highlight[ids[known]]
+        colors = np.where(critical[:, None], CRITICAL_EDGE_COLOR, (0.0, 0.0, 0.0, 1.0))
+        return colors, np.where(critical, CRITICAL_LINEWIDTH, 1.0)
+
+    def on_limits_changed(self, ax):
+        if not self.updating:
+            self.refresh_detail()
+
+    def visible_rows(self):
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        first = max(0, int(np.ceil(y0 - BAR_HEIGHT / 2)))
+        last = min(len(self.row_ids), int(np.floor(y1 + BAR_HEIGHT / 2)) + 1)
+        if last - first > INDEXED_CULL_ROWS:
+            # zoomed in on time only: ask the interval index instead of scanning every row,
+            # then keep the hits that have a row in view
+            ids = self.index.overlap(int(np.ceil(x0)) + EPOCH_ORDINAL, int(np.floor(x1)) + EPOCH_ORDINAL)
+            rows = self.row_of[ids[ids < len(self.row_of)]]
+            rows = rows[(rows >= first) & (rows < last)]
+            return rows if self.tree is None else np.sort(rows)
+        rows = np.arange(first, max(first, last))
+        in_view = (self.row_ends[first:last] >= x0) & (self.row_starts[first:last] <= x1)
+        return rows[in_view]
+
+    def refresh_detail(self):
+        with profiler.span('detail') as span:
+            self.update_detail()
+            if profiler.enabled:
+                span.set(**self.artist_counts())
+
+    def viewport(self):
+        # the part of the axes that is actually on the canvas, in pixels
+        bbox = Bbox.intersection(self.ax.bbox, self.figure.bbox)
+        return (1.0, 1.0) if bbox is None else (max(bbox.width, 1.0), max(bbox.height, 1.0))
+
+    def update_detail(self):
+        # level of detail: individual bars and labels when zoomed in, a density band when rows are sub-pixel;
+        # with rows at least MIN_ROW_PIXELS tall only a screenful of bars is ever drawn, however thin they are
+        y0, y1 = self.ax.get_ylim()
+        px_per_row = self.viewport()[1] / max(y1 - y0, 1e-9)
+        rows = self.visible_rows()
+
+        detail = not self.lod or not len(rows) or px_per_row >= MIN_ROW_PIXELS
+        self.detail = detail
+        self.bars.set_visible(detail)
+        self.density.set_visible(not detail)
+        if not detail:
+            self.update_density(rows, *self.ax.get_xlim(), y0, y1)
+        else:
+            drawn = rows if self.lod else np.arange(len(self.row_ids))
+            self.bars.set_paths([Path(vert, BAR_CODES) for vert in self.verts[drawn]])
+            self.bars.set_facecolor(self.row_colors[drawn])
+            edge_colors, line_widths = self.row_edges(drawn)
+            self.bars.set_edgecolor(edge_colors)
+            self.bars.set_linewidth(line_widths)
+
+        show_labels = detail and len(rows) <= MAX_BAR_LABELS and (not self.lod or px_per_row >= MIN_LABEL_ROW_PIXELS)
+        with profiler.span('bar labels'):
+            self.update_bar_labels(rows if show_labels else rows[:0])
+
+    def update_density(self, rows, x0, x1, y0, y1):
+        # one cell per DENSITY_CELL_PIXELS of the viewport, but never finer than a day by a row
+        width, height = self.viewport()
+        columns = max(1, min(int(width // DENSITY_CELL_PIXELS), int(np.ceil(x1 - x0)) + 1))
+        bands = max(1, min(int(height // DENSITY_CELL_PIXELS), int(np.ceil(y1 - y0))))
+        scale = columns / (x1 - x0)
+        first = np.clip(((self.row_starts[rows] - x0) * scale).astype(int), 0, columns - 1)
+        last = np.clip(((self.row_ends[rows] - x0) * scale).astype(int), 0, columns - 1)
+        band = np.clip(((rows - y0) * (bands / (y1 - y0))).astype(int), 0, bands - 1)
+
+        # difference array per band: +1 where a task starts, -1 after it ends, then a running sum
+        width = columns + 1
+        diff = np.bincount(band * width + first, minlength=bands * width)
+        diff -= np.bincount(band * width + last + 1, minlength=bands * width)
+        counts = np.cumsum(diff.reshape(bands, width)[:, :columns], axis=1)
+
+        self.density.set_data(np.ma.masked_equal(counts, 0))
+        self.density.set_extent((x0, x1, y0, y1))
+        self.density.set_clim(0, max(1, counts.max()))
+
+    def update_bar_labels(self, rows):
+        wanted = dict(zip(self.row_ids[rows].tolist(), rows.tolist()))
+        for task_id in [task_id for task_id in self.bar_labels if task_id not in wanted]:
+            self.bar_labels.pop(task_id).remove()
+
+        for task_id, row in wanted.items():
+            label = self.bar_labels.get(task_id)
+            if label is None:
+                duration = int(round(self.row_ends[row] - self.row_starts[row])) + 1
+                self.bar_labels[task_id] = self.ax.text(
+                    (self.row_starts[row] + self.row_ends[row]) / 2, row,
+                    persian_text(f"{duration} روز"),
+                    ha='center', va='center',
+                    color='black',
+                    fontsize=36,
+                    fontweight='bold',
+                    clip_on=True
+                )
+            else:
+                label.set_y(row)
+
+    def update_date_axis(self):
+        date_range = self.fixed_date_range or self.index.extent()
+        if date_range is None or date_range == self.date_range:
+            return False
+        self.date_range = date_range
+        lo, hi = ordinal_to_num(date_range[0]), ordinal_to_num(date_range[1])
+        pad = (hi - lo) * self.ax.margins()[0]
+        self.ax.set_xlim(lo - pad, hi + pad)
+        for text in self.axis_texts:
+            text.remove()
+        mode, self.axis_texts = format_date_axis(self.ax, *date_range)
+        if self.load_ax is not None:
+            rotate_date_labels(self.load_ax, mode)
+        relayout = mode != self.axis_mode
+        self.axis_mode = mode
+        return relayout
+
+
+def build_figure(tasks):
+    chart = GanttChart(tasks)
+    return chart.figure, chart.ax
+
+
+def render_chart(tasks, highlight=None, resources=None, tree=None, figsize=VIEW_SIZE, check=no_check):
+    # the on-screen chart is drawn at the window's size whatever the row count; zooming,
+    # scrolling and the level of detail deal with the rows, exports keep the full-height figure
+    with profiler.span('render', caches=True, tasks=len(tasks)):
+        chart = GanttChart(tasks, figsize=figsize, check=check, highlight=highlight, resources=resources, tree=tree)
+        check(0.6, 'draw')
+        with profiler.span('draw'):
+            chart.figure.canvas.draw()
+    check(1.0, 'done')
+    return chart
+
+
+def save_figure(figure, path, dpi=300):
+    fmt = os.path.splitext(path)[1][1:].lower() or 'png'
+    partial = path + '.part'
+    try:
+        figure.savefig(partial, format=fmt, dpi=dpi, bbox_inches='tight', facecolor='white')
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def render_to_file(tasks, path, dpi=300, check=no_check, highlight=None, resources=None, tree=None):
+    with profiler.span('export', caches=True, tasks=len(tasks), dpi=dpi):
+        chart = GanttChart(tasks, check=check, highlight=highlight, resources=resources, tree=tree)
+        check(0.5, 'save')
+        with profiler.span('savefig'):
+            save_figure(chart.figure, path, dpi=dpi)
+    check(1.0, 'done')
+    return path
@@ -0,0 +1,277 @@
+import numpy as np
+
+ROOT = -1
+INITIAL_CAPACITY = 64
+
+
+class TaskTree:
+    # Parent links over a TaskStore. A task with children is a summary task: its dates
+    # are the span of its children, rolled up ancestor by ancestor when a child changes,
+    # and the climb stops at the first ancestor whose span did not move. Children of a
+    # collapsed summary are never listed, so visible() costs the rows that are shown
+    # rather than the size of the work-breakdown structure.
+    def __init__(self, tasks, on_rollup=None):
+        self.tasks = tasks
+        # called with the summaries whose dates a rollup changed, e.g. Schedule.reload
+        self.on_rollup = on_rollup
+        self.parents = np.full(max(tasks.size, INITIAL_CAPACITY), ROOT, dtype=np.int32)
+        self.child_counts = np.zeros(len(self.parents), dtype=np.int32)
+        self.children = {}
+        self.expanded = set()
+        self.version = 0
+        self._visible = None
+        self._visible_key = None
+
+    def sync(self):
+        size = self.tasks.size
+        if size > len(self.parents):
+            capacity = max(len(self.parents), INITIAL_CAPACITY)
+            while capacity < size:
+                capacity *= 2
+            parents = np.full(capacity, ROOT, dtype=np.int32)
+            parents[:len(self.parents)] = self.parents
+            counts = np.zeros(capacity, dtype=np.int32)
+            counts[:len(self.child_counts)] = self.child_counts
+            self.parents, self.child_counts = parents, counts
+
+    def check_task(self, task_id):
+        if not 0 <= task_id < self.tasks.size or not self.tasks.alive[task_id]:
+            raise ValueError(f"تسک {task_id} وجود ندارد")
+
+    def parent(self, task_id):
+        self.sync()
+        parent = int(self.parents[task_id])
+        return None if parent == ROOT else parent
+
+    def is_summary(self, ids):
+        self.sync()
+        return self.child_counts[ids] > 0
+
+    def __len__(self):
+        return len(self.children)
+
+    def ancestors(self, task_id):
+        parent = int(self.parents[task_id])
+        while parent != ROOT:
+            yield parent
+            parent = int(self.parents[parent])
+
+    def set_parent(self, task_id, parent):
+        self.sync()
+        self.check_task(task_id)
+        if parent is not None:
+            self.check_task(parent)
+            if parent == task_id or task_id in self.ancestors(parent):
+                raise ValueError("یک تسک نمی‌تواند زیرمجموعه‌ی خودش باشد")
+        old = int(self.parents[task_id])
+        if old != ROOT:
+            self.detach(task_id, old)
+        if parent is not None:
+            self.children.setdefault(parent, []).append(task_id)
+            self.parents[task_id] = parent
+            self.child_counts[parent] += 1
+        self.version += 1
+        self.rollup_parents({old, ROOT if parent is None else parent})
+
+    def detach(self, task_id, parent):
+        siblings = self.children[parent]
+        siblings.remove(task_id)
+        if not siblings:
+            del self.children[parent]
+            self.expanded.discard(parent)
+        self.parents[task_id] = ROOT
+        self.child_counts[parent] -= 1
+
+    def set_parents(self, ids, parents):
+        # bulk load of a whole work-breakdown structure: one vectorized rollup, levels bottom-up
+        self.sync()
+        ids = np.asarray(ids, dtype=np.int64)
+        parents = np.asarray(parents, dtype=np.int64)
+        if len(ids) and (self.parents[ids] != ROOT).any():
+            raise ValueError("این تسک‌ها از قبل والد دارند")
+        self.parents[ids] = parents
+        if self.depths() is None:
+            self.parents[ids] = ROOT
+            raise ValueError("یک تسک نمی‌تواند زیرمجموعه‌ی خودش باشد")
+
+        order = np.argsort(parents, kind='stable')
+        ids, parents = ids[order], parents[order]
+        keep = parents != ROOT
+        ids, parents = ids[keep], parents[keep]
+        first = np.flatnonzero(np.r_[True, parents[1:] != parents[:-1]]) if len(parents) else np.empty(0, dtype=np.intp)
+        for parent, group in zip(parents[first].tolist(), np.split(ids, first[1:])):
+            self.children.setdefault(parent, []).extend(group.tolist())
+        np.add.at(self.child_counts, parents, 1)
+        self.version += 1
+        self.rollup_all()
+
+    def depths(self):
+        # pointer jumping: after k rounds every task knows its ancestor 2**k levels up
+        size = self.tasks.size
+        up = self.parents[:size].astype(np.int64)
+        depth = (up != ROOT).astype(np.int64)
+        for _ in range(int(np.log2(max(size, 1))) + 2):
+            active = up != ROOT
+            if not active.any():
+                return depth
+            target = up[active]
+            depth[active] += depth[target]
+            up[active] = up[target]
+        return None
+
+    def rollup_all(self):
+        size = self.tasks.size
+        depth = self.depths()
+        summaries = np.flatnonzero(self.child_counts[:size] > 0)
+        if not len(summaries):
+            return
+        tasks = self.tasks
+        alive = tasks.alive[:size]
+        lo = tasks.starts[:size].astype(np.int64)
+        hi = tasks.ends[:size].astype(np.int64)
+        lo[summaries] = np.iinfo(np.int64).max
+        hi[summaries] = np.iinfo(np.int64).min
+        for level in range(int(depth.max()), 0, -1):
+            nodes = np.flatnonzero((depth == level) & alive)
+            np.minimum.at(lo, self.parents[nodes], lo[nodes])
+            np.maximum.at(hi, self.parents[nodes], hi[nodes])
+        summaries = summaries[hi[summaries] >= lo[summaries]]
+        tasks.set_dates(summaries, lo[summaries], hi[summaries])
+        if self.on_rollup is not None:
+            self.on_rollup(summaries)
+
+    def span(self, parent):
+        children = np.array(self.children[parent])
+        children = children[self.tasks.alive[children]]
+        if not len(children):
+            return None
+        return int(self.tasks.starts[children].min()), int(self.tasks.ends[children].max())
+
+    def rollup(self, ids):
+        # called with the tasks whose dates changed, e.g. as the schedule's on_commit
+        self.sync()
+        self.rollup_parents({int(self.parents[task_id]) for task_id in np.asarray(ids).tolist()})
+
+    def rollup_parents(self, pending):
+        tasks = self.tasks
+        pending = pending - {ROOT}
+        while pending:
+            moved = set()
+            for parent in pending:
+                span = self.span(parent) if parent in self.children else None
+                if span is not None and span != (int(tasks.starts[parent]), int(tasks.ends[parent])):
+                    tasks.set_dates([parent], [span[0]], [span[1]])
+                    if self.on_rollup is not None:
+                        self.on_rollup([parent])
+                    moved.add(int(self.parents[parent]))
+            pending = moved - {ROOT}
+
+    def subtree(self, task_id):
+        ids = [task_id]
+        stack = [task_id]
+        while stack:
+            for child in self.children.get(stack.pop(), ()):
+                ids.append(child)
+                stack.append(child)
+        return ids
+
+    def remove(self, task_id):
+        # a summary goes with everything under it
+        self.sync()
+        removed = self.subtree(task_id)
+        parent = int(self.parents[task_id])
+        if parent != ROOT:
+            self.detach(task_id, parent)
+        for node in removed:
+            self.tasks.remove(node)
+            if node in self.children:
+                for child in self.children.pop(node):
+                    self.parents[child] = ROOT
+                self.child_counts[node] = 0
+                self.expanded.discard(node)
+        self.version += 1
+        self.rollup_parents({parent})
+        return removed
+
+    def toggle(self, task_id):
+        if task_id in self.expanded:
+            self.expanded.discard(task_id)
+        elif task_id in self.children:
+            self.expanded.add(task_id)
+        self.version += 1
+
+    def expand(self, task_id):
+        if task_id in self.children and task_id not in self.expanded:
+            self.toggle(task_id)
+
+    def expand_all(self):
+        self.expanded = set(self.children)
+        self.version += 1
+
+    def collapse(self, task_id):
+        if task_id in self.expanded:
+            self.toggle(task_id)
+
+    def visible(self):
+        # (ids, depths) of the rows to show: top-level tasks in id order, with the children
+        # of every expanded summary spliced in after it
+        self.sync()
+        key = (self.version, self.tasks.size, self.tasks.count)
+        if key == self._visible_key:
+            return self._visible
+        ids = self.tasks.ids()
+        roots = ids[self.parents[ids] == ROOT]
+        parts, depths = [], []
+        self.splice(roots, parts, depths)
+        self._visible = (np.concatenate(parts), np.concatenate(depths))
+        self._visible_key = key
+        return self._visible
+
+    def splice(self, roots, parts, depths):
+        # depth first with an explicit stack of (ids, expanded positions, next, first unlisted,
+        # depth) frames, so a deep chain of expanded summaries cannot hit the recursion limit
+        expanded = np.zeros(self.tasks.size, dtype=bool)
+        expanded[list(self.expanded)] = True
+        stack = [[roots, np.flatnonzero(expanded[roots]).tolist(), 0, 0, 0]]
+        while stack:
+            frame = stack[-1]
+            ids, positions, index, first, depth = frame
+            if index == len(positions):
+                parts.append(ids[first:])
+                depths.append(np.full(len(ids) - first, depth, dtype=np.int32))
+                stack.pop()
+                continue
+            position = positions[index]
+            parts.append(ids[first:position + 1])
+            depths.append(np.full(position + 1 - first, depth, dtype=np.int32))
+            frame[2], frame[3] = index + 1, position + 1
+            children = np.array(self.children[int(ids[position])], dtype=np.intp)
+            children = children[self.tasks.alive[children]]
+            stack.append([children, np.flatnonzero(expanded[children]).tolist(), 0, 0, depth + 1])
+
+    def snapshot(self, tasks):
+        copy = TaskTree(tasks)
+        copy.parents = self.parents.copy()
+        copy.child_counts = self.child_counts.copy()
+        copy.children = {parent: list(children) for parent, children in self.children.items()}
+        copy.expanded = set(self.expanded)
+        copy.version = self.version
+        return copy
+
+
+class PageRows:
+    # the rows of one export page, already in display order: depths, summary flags and
+    # expanded flags taken from the hierarchy, so a page chart indents and marks summary
+    # rows without the rest of the project's tree
+    version = 0
+
+    def __init__(self, depths, summaries, expanded):
+        self.depths = depths
+        self.summaries = summaries
+        self.expanded = set(np.flatnonzero(expanded).tolist())
+
+    def visible(self):
+        return np.arange(len(self.depths)), self.depths
+
+    def is_summary(self, ids):
+        return self.summaries[ids]
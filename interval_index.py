@@ -0,0 +1,113 @@
+import numpy as np
+
+MIN_PENDING = 1024
+PENDING_FRACTION = 8
+DEAD_FRACTION = 4
+
+
+def first_alive(ids, alive):
+    # removed tasks are rare at the ends of the sort orders, so look at growing blocks
+    start, step = 0, 16
+    while start < len(ids):
+        block = ids[start:start + step]
+        hits = np.flatnonzero(alive[block])
+        if len(hits):
+            return int(block[hits[0]])
+        start += step
+        step *= 2
+    return None
+
+
+class IntervalIndex:
+    # Tasks are binned by duration (powers of two) and sorted by start inside each bin.
+    # A task in bin b is at most max_length[b] days long, so everything overlapping
+    # [lo, hi] in that bin starts inside [lo - max_length[b], hi]: two binary searches
+    # per bin, and the false positives are bounded by the bin's factor of two.
+    # Appended tasks wait in a small unsorted tail until it is worth re-sorting;
+    # removed tasks are filtered with the alive mask until enough of them pile up.
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.indexed = 0
+        self.edits = None
+        self.count = 0
+        self.ids = np.empty(0, dtype=np.intp)
+        self.starts = np.empty(0, dtype=np.int32)
+        self.bounds = np.zeros(1, dtype=np.intp)
+        self.max_lengths = np.empty(0, dtype=np.int64)
+        self.by_start = np.empty(0, dtype=np.intp)
+        self.by_end = np.empty(0, dtype=np.intp)
+
+    def rebuild(self):
+        tasks = self.tasks
+        ids = tasks.ids()
+        starts = tasks.starts[ids]
+        lengths = tasks.ends[ids].astype(np.int64) - starts
+        bins = np.zeros(len(ids), dtype=np.int64)
+        positive = lengths > 0
+        bins[positive] = np.floor(np.log2(lengths[positive])).astype(np.int64) + 1
+
+        order = np.argsort((bins << 32) | starts.astype(np.int64), kind='stable')
+        self.ids = ids[order]
+        self.starts = starts[order]
+        count = np.bincount(bins, minlength=1)
+        self.bounds = np.concatenate([[0], np.cumsum(count)])
+        self.max_lengths = 2 ** np.arange(len(count), dtype=np.int64) - 1
+
+        self.by_start = ids[np.argsort(starts, kind='stable')]
+        self.by_end = ids[np.argsort(tasks.ends[ids], kind='stable')]
+        self.indexed = tasks.size
+        self.edits = tasks.edits
+        self.count = len(ids)
+
+    def refresh(self):
+        tasks = self.tasks
+        if tasks.edits != self.edits or tasks.size < self.indexed:
+            self.rebuild()
+            return
+        pending = tasks.size - self.indexed
+        if pending > max(MIN_PENDING, self.count // PENDING_FRACTION):
+            self.rebuild()
+            return
+        dead = self.count - (tasks.count - int(tasks.alive[self.indexed:tasks.size].sum()))
+        if dead > self.count // DEAD_FRACTION:
+            self.rebuild()
+
+    def pending(self):
+        first = self.indexed
+        ids = np.arange(first, self.tasks.size)
+        return ids[self.tasks.alive[first:self.tasks.size]]
+
+    def overlap(self, lo, hi):
+        self.refresh()
+        tasks = self.tasks
+        parts = []
+        for b in range(len(self.max_lengths)):
+            first, last = self.bounds[b], self.bounds[b + 1]
+            starts = self.starts[first:last]
+            i = np.searchsorted(starts, lo - self.max_lengths[b], 'left')
+            j = np.searchsorted(starts, hi, 'right')
+            if i < j:
+                parts.append(self.ids[first + i:first + j])
+        parts.append(self.pending())
+        ids = np.concatenate(parts)
+        keep = (tasks.ends[ids] >= lo) & (tasks.starts[ids] <= hi) & tasks.alive[ids]
+        return np.sort(ids[keep])
+
+    def stab(self, day):
+        return self.overlap(day, day)
+
+    def extent(self):
+        self.refresh()
+        tasks = self.tasks
+        alive = tasks.alive
+        first = first_alive(self.by_start, alive)
+        last = first_alive(self.by_end[::-1], alive)
+        lows = [] if first is None else [int(tasks.starts[first])]
+        highs = [] if last is None else [int(tasks.ends[last])]
+        pending = self.pending()
+        if len(pending):
+            lows.append(int(tasks.starts[pending].min()))
+            highs.append(int(tasks.ends[pending].max()))
+        if not lows:
+            return None
+        return min(lows), max(highs)
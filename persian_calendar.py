@@ -0,0 +1,133 @@
+from datetime import date
+from functools import lru_cache
+
+import jdatetime as jdt
+import numpy as np
+from arabic_reshaper import reshape
+from bidi.algorithm import get_display
+
+CACHE_SIZE = 8192
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+FIRST_JALALI_YEAR = 1200
+LAST_JALALI_YEAR = 1600
+MONTH_OFFSETS = np.array([0, 0, 31, 62, 93, 124, 155, 186, 216, 246, 276, 306, 336])
+DATE_WIDTH = 10
+ASCII_ZERO = ord('0')
+PERSIAN_ZERO = ord('۰')
+PERSIAN_DIGITS = str.maketrans('۰۱۲۳۴۵۶۷۸۹', '0123456789')
+
+_label_table = {}
+_table_stats = {'hits': 0, 'misses': 0}
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def persian_text(text):
+    reshaped_text = reshape(text)
+    return get_display(reshaped_text)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def jalali_date(ordinal):
+    jdate = jdt.date.fromgregorian(date=date.fromordinal(ordinal))
+    return jdate.year, jdate.month, jdate.day, jdate.weekday()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def jalali_label(ordinal, fmt="%Y-%m-%d"):
+    year, month, day, _ = jalali_date(ordinal)
+    return jdt.date(year, month, day).strftime(fmt)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _persian_label(ordinal, fmt):
+    return persian_text(jalali_label(ordinal, fmt))
+
+
+def persian_label(ordinal, fmt="%Y-%m-%d"):
+    label = _label_table.get((ordinal, fmt))
+    if label is not None:
+        _table_stats['hits'] += 1
+        return label
+    _table_stats['misses'] += 1
+    return _persian_label(ordinal, fmt)
+
+
+def num_to_ordinal(x):
+    # matplotlib date numbers count days from 1970-01-01
+    return int(x // 1) + EPOCH_ORDINAL
+
+
+def ordinal_to_num(ordinal):
+    return float(ordinal - EPOCH_ORDINAL)
+
+
+def precompute_labels(first_ordinal, last_ordinal, formats=("%Y-%m-%d",)):
+    _label_table.clear()
+    for ordinal in range(first_ordinal, last_ordinal + 1):
+        for fmt in formats:
+            _label_table[(ordinal, fmt)] = _persian_label(ordinal, fmt)
+
+
+def cache_stats():
+    stats = {'table': dict(_table_stats, size=len(_label_table))}
+    for name, func in (('persian_text', persian_text), ('jalali_date', jalali_date),
+                       ('jalali_label', jalali_label), ('persian_label', _persian_label)):
+        info = func.cache_info()
+        stats[name] = {'hits': info.hits, 'misses': info.misses, 'size': info.currsize}
+    return stats
+
+
+def clear_caches():
+    _label_table.clear()
+    _table_stats['hits'] = _table_stats['misses'] = 0
+    for func in (persian_text, jalali_date, jalali_label, _persian_label):
+        func.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def _new_year_ordinals():
+    return np.array([
+        jdt.date(year, 1, 1).togregorian().toordinal()
+        for year in range(FIRST_JALALI_YEAR, LAST_JALALI_YEAR + 2)
+    ])
+
+
+def jalali_to_ordinals(years, months, days):
+    new_years = _new_year_ordinals()
+    valid = (years >= FIRST_JALALI_YEAR) & (years <= LAST_JALALI_YEAR) & (months >= 1) & (months <= 12)
+    year_index = np.where(valid, years - FIRST_JALALI_YEAR, 0)
+    month = np.where(valid, months, 1)
+    esfand_length = new_years[year_index + 1] - new_years[year_index] - 336
+    month_length = np.where(month <= 6, 31, np.where(month <= 11, 30, esfand_length))
+    valid &= (days >= 1) & (days <= month_length)
+    ordinals = new_years[year_index] + MONTH_OFFSETS[month] + days - 1
+    return ordinals, valid
+
+
+def _split_dates(texts):
+    # fast path: fixed-width YYYY-MM-DD with ASCII or Persian digits
+    strings = np.asarray(texts, dtype=str)
+    codes = strings.astype(f'U{DATE_WIDTH}').view(np.uint32).reshape(len(strings), DATE_WIDTH).astype(np.int32)
+    digits = np.where(codes >= PERSIAN_ZERO, codes - PERSIAN_ZERO, codes - ASCII_ZERO)
+    fixed = (np.char.str_len(strings) == DATE_WIDTH) & (codes[:, 4] == ord('-')) & (codes[:, 7] == ord('-'))
+    for column in (0, 1, 2, 3, 5, 6, 8, 9):
+        fixed &= (digits[:, column] >= 0) & (digits[:, column] <= 9)
+    years = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    months = digits[:, 5] * 10 + digits[:, 6]
+    days = digits[:, 8] * 10 + digits[:, 9]
+    parsed = fixed.copy()
+
+    for i in np.flatnonzero(~fixed).tolist():
+        text = str(strings[i]).strip().translate(PERSIAN_DIGITS).replace('/', '-')
+        parts = text.split('-')
+        if len(parts) == 3 and all(part.isdigit() and len(part) <= 4 for part in parts):
+            years[i], months[i], days[i] = (int(part) for part in parts)
+            parsed[i] = True
+    return years, months, days, parsed
+
+
+def parse_jalali_dates(texts):
+    years, months, days, parsed = _split_dates(texts)
+    ordinals, valid = jalali_to_ordinals(years, months, days)
+    return ordinals, valid & parsed
@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from persian_calendar import cache_stats
+
+MAX_EVENTS = 100000
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.profiler.record(self.name, self.start, end - self.start, self.args)
+        return False
+
+    def set(self, **args):
+        self.args.update(args)
+
+
+class CacheSpan(Span):
+    # also records how many label/shaping cache lookups hit while the span was open
+    def __enter__(self):
+        self.before = cache_stats()
+        return super().__enter__()
+
+    def __exit__(self, *exc):
+        after = cache_stats()
+        for name, stats in after.items():
+            hits = stats['hits'] - self.before[name]['hits']
+            misses = stats['misses'] - self.before[name]['misses']
+            if hits or misses:
+                self.args[f'{name} hits'] = hits
+                self.args[f'{name} misses'] = misses
+        return super().__exit__(*exc)
+
+
+class Profiler:
+    # Disabled, span() returns a shared no-op context and count()/add_time() return
+    # after one attribute check, so the instrumentation can stay in the hot paths.
+    def __init__(self):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.counters = {}
+        self.timers = {}
+        self.lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+            self.counters.clear()
+            self.timers.clear()
+
+    def span(self, name, caches=False, **args):
+        if not self.enabled:
+            return NULL_SPAN
+        return (CacheSpan if caches else Span)(self, name, args)
+
+    def record(self, name, start, duration, args):
+        self.events.append((name, start - self.origin, duration, threading.get_ident(), args))
+
+    def count(self, name, value=1):
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_time(self, name, seconds):
+        if self.enabled:
+            with self.lock:
+                calls, total = self.timers.get(name, (0, 0.0))
+                self.timers[name] = (calls + 1, total + seconds)
+
+    def summary(self):
+        phases = {}
+        for name, _, duration, _, _ in list(self.events):
+            phase = phases.setdefault(name, {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            phase['calls'] += 1
+            phase['total_ms'] += duration * 1000
+            phase['max_ms'] = max(phase['max_ms'], duration * 1000)
+        with self.lock:
+            timers = {name: {'calls': calls, 'total_ms': total * 1000} for name, (calls, total) in self.timers.items()}
+            counters = dict(self.counters)
+        return {'phases': phases, 'timers': timers, 'counters': counters}
+
+    def last(self, name):
+        for event in reversed(list(self.events)):
+            if event[0] == name:
+                return event
+        return None
+
+    def to_json(self):
+        data = self.summary()
+        data['events'] = [
+            {'name': name, 'start_ms': start * 1000, 'duration_ms': duration * 1000, 'thread': thread, 'args': args}
+            for name, start, duration, thread, args in list(self.events)
+        ]
+        return data
+
+    def to_trace(self):
+        # Chrome trace-event format: complete ("X") events in microseconds, loadable in chrome://tracing or Perfetto
+        pid = os.getpid()
+        return {
+            'traceEvents': [
+                {'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6, 'pid': pid, 'tid': thread,
+                 'args': args}
+                for name, start, duration, thread, args in list(self.events)
+            ],
+            'displayTimeUnit': 'ms',
+        }
+
+    def save(self, path, trace=False):
+        data = self.to_trace() if trace else self.to_json()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        return path
+
+    def report(self):
+        data = self.summary()
+        lines = [f"{'phase':<24}{'calls':>7}{'total ms':>11}{'mean ms':>10}{'max ms':>10}"]
+        for name, phase in sorted(data['phases'].items(), key=lambda item: -item[1]['total_ms']):
+            mean = phase['total_ms'] / phase['calls']
+            lines.append(f"{name:<24}{phase['calls']:>7}{phase['total_ms']:>11.1f}{mean:>10.2f}{phase['max_ms']:>10.1f}")
+        for name, timer in sorted(data['timers'].items()):
+            lines.append(f"{name:<24}{timer['calls']:>7}{timer['total_ms']:>11.1f}")
+        for name, value in sorted(data['counters'].items()):
+            lines.append(f"{name:<24}{value:>7}")
+        for name in sorted(data['phases']):
+            args = self.last(name)[4]
+            if args:
+                lines.append(f"{name}: " + ", ".join(f"{key}={value}" for key, value in args.items()))
+        return "\n".join(lines)
+
+
+profiler = Profiler()
@@ -0,0 +1,360 @@
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from hierarchy import ROOT
+from resources import UNIT_SCALE
+from scheduling import DEPENDENCY_KINDS
+from task_store import StringTable, TaskStore
+
+MAGIC = b"GNTP"
+SEGMENT_MAGIC = b"SEG1"
+# version 2 adds a parent column to every segment, version 3 date patches for rows of earlier
+# segments and the dependencies, version 4 the resources and their assignments; older files
+# open without what their version lacks
+VERSION = 4
+READ_VERSIONS = (1, 2, 3, 4)
+SUFFIX = ".gantt"
+
+# magic, version, reserved, segment count, committed length (end of the last complete segment)
+HEADER = struct.Struct("<4sHHIQ12x")
+# magic, task count, new names, new palette entries, name bytes, palette bytes
+SEGMENT_HEADER = struct.Struct("<4sIIIQQ")
+# version 3: date patches, new dependencies
+EDIT_HEADER = struct.Struct("<II")
+# version 4: new resources, new assignments, resource name bytes
+RESOURCE_HEADER = struct.Struct("<IIQ")
+ALIGNMENT = 8
+
+
+def _padding(size):
+    return -size % ALIGNMENT
+
+
+def _string_block(strings):
+    encoded = [text.encode("utf-8") for text in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def _file_rows(tasks):
+    # file row of every live task id: rows are the live tasks in id order, which is
+    # also what the ids become when the file is opened again
+    return np.cumsum(tasks.alive[:tasks.size]) - 1
+
+
+def _file_parents(tasks, tree, ids):
+    if tree is None:
+        return np.full(len(ids), ROOT, dtype=np.int64)
+    tree.sync()
+    parents = tree.parents[ids].astype(np.int64)
+    return np.where(parents == ROOT, ROOT, _file_rows(tasks)[np.maximum(parents, 0)])
+
+
+def _file_edges(tasks, schedule):
+    # dependencies as (keys, codes) sorted by key = predecessor row << 32 | successor row
+    if schedule is None:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    preds, succs, codes = schedule.edges()
+    rows = _file_rows(tasks)
+    keys = rows[preds] << 32 | rows[succs]
+    order = np.argsort(keys)
+    return keys[order], codes[order]
+
+
+def _file_assignments(tasks, pool):
+    # (task rows, resource ids, units in thousandths) in the pool's order, live tasks only
+    if pool is None:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    task_ids = pool.task_ids[:pool.size]
+    live = tasks.alive[task_ids]
+    return (_file_rows(tasks)[task_ids[live]], pool.resource_ids[:pool.size][live].astype(np.int64),
+            pool.units[:pool.size][live].astype(np.int64))
+
+
+def _segment_bytes(tasks, ids, parents, first_name, first_color, patches, edges, resources):
+    name_offsets, name_blob = tasks.names.encoded(first_name)
+    palette_offsets, palette_blob = _string_block(tasks.palette[first_color:])
+    patch_rows, patch_ids = patches
+    edge_keys, edge_codes = edges
+    resource_names, capacities, (assigned_rows, resource_ids, units) = resources
+    resource_offsets, resource_blob = _string_block(resource_names)
+    parts = [SEGMENT_HEADER.pack(SEGMENT_MAGIC, len(ids), len(name_offsets) - 1, len(palette_offsets) - 1,
+                                 len(name_blob), len(palette_blob)),
+             EDIT_HEADER.pack(len(patch_rows), len(edge_keys)),
+             RESOURCE_HEADER.pack(len(resource_names), len(assigned_rows), len(resource_blob))]
+    for block in (tasks.starts[ids].astype("<i4").tobytes(),
+                  tasks.ends[ids].astype("<i4").tobytes(),
+                  tasks.colors[ids].astype("<u2").tobytes(),
+                  tasks.name_ids[ids].astype("<i4").tobytes(),
+                  parents.astype("<i4").tobytes(),
+                  name_offsets.astype("<u8").tobytes(), name_blob,
+                  palette_offsets.astype("<u8").tobytes(), palette_blob,
+                  patch_rows.astype("<i4").tobytes(),
+                  tasks.starts[patch_ids].astype("<i4").tobytes(),
+                  tasks.ends[patch_ids].astype("<i4").tobytes(),
+                  (edge_keys >> 32).astype("<i4").tobytes(),
+                  (edge_keys & 0xFFFFFFFF).astype("<i4").tobytes(),
+                  edge_codes.astype("<i4").tobytes(),
+                  np.asarray(capacities, dtype="<f8").tobytes(),
+                  resource_offsets.astype("<u8").tobytes(), resource_blob,
+                  assigned_rows.astype("<i4").tobytes(),
+                  resource_ids.astype("<i4").tobytes(),
+                  units.astype("<i8").tobytes()):
+        parts.append(block)
+        parts.append(b"\0" * _padding(len(block)))
+    return b"".join(parts)
+
+
+class ProjectFile:
+    def __init__(self, path):
+        self.path = path
+        self.segment_count = 0
+        self.length = HEADER.size
+        self.written_end = 0
+        self.written_count = 0
+        self.name_count = 0
+        self.palette_count = 0
+        self.version = VERSION
+        # parent rows of the written tasks (ROOT for top-level ones)
+        self.parents = np.empty(0, dtype=np.int64)
+        # written dependencies, as from _file_edges
+        self.edge_keys = np.empty(0, dtype=np.int64)
+        self.edge_codes = np.empty(0, dtype=np.int64)
+        # written resources and assignments, as from _file_assignments
+        self.resource_names = []
+        self.capacities = []
+        empty = np.empty(0, dtype=np.int64)
+        self.assignments = (empty, empty, empty)
+        self.mapping = None
+
+    @classmethod
+    def open(cls, path):
+        project = cls(path)
+        with open(path, "rb") as f:
+            # copy-on-write: edits to the mapped columns stay in memory until the next save
+            project.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        buffer = project.mapping
+
+        magic, version, _, segment_count, length = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"فایل پروژه معتبر نیست: {path}")
+        if version not in READ_VERSIONS:
+            raise ValueError(f"نسخه فایل پروژه پشتیبانی نمی‌شود: {version}")
+
+        dtypes = {"starts": "<i4", "ends": "<i4", "colors": "<u2", "name_ids": "<i4"}
+        if version >= 2:
+            dtypes["parents"] = "<i4"
+        columns = {key: [] for key in dtypes}
+        edits = {key: [] for key in ("patch_rows", "patch_starts", "patch_ends", "preds", "succs", "codes",
+                                     "assigned_rows", "resource_ids", "units")}
+        names = StringTable(buffer)
+        palette = []
+        resource_names = []
+        capacities = []
+        offset = HEADER.size
+        for _ in range(segment_count):
+            magic, count, name_count, palette_count, name_bytes, palette_bytes = SEGMENT_HEADER.unpack_from(buffer, offset)
+            if magic != SEGMENT_MAGIC:
+                raise ValueError(f"فایل پروژه خراب است: {path}")
+            offset += SEGMENT_HEADER.size
+            patch_count = edge_count = 0
+            if version >= 3:
+                patch_count, edge_count = EDIT_HEADER.unpack_from(buffer, offset)
+                offset += EDIT_HEADER.size
+            resource_count = assignment_count = resource_bytes = 0
+            if version >= 4:
+                resource_count, assignment_count, resource_bytes = RESOURCE_HEADER.unpack_from(buffer, offset)
+                offset += RESOURCE_HEADER.size
+
+            def take(dtype, n):
+                nonlocal offset
+                view = np.frombuffer(buffer, dtype=dtype, count=n, offset=offset)
+                offset += view.nbytes + _padding(view.nbytes)
+                return view
+
+            def take_strings(n, blob_bytes):
+                nonlocal offset
+                offsets = take("<u8", n + 1)
+                blob = buffer[offset:offset + blob_bytes]
+                offset += blob_bytes + _padding(blob_bytes)
+                return [blob[int(offsets[i]):int(offsets[i + 1])].decode("utf-8") for i in range(n)]
+
+            for key, dtype in dtypes.items():
+                columns[key].append(take(dtype, count))
+            names.add_block(take("<u8", name_count + 1), offset)
+            offset += name_bytes + _padding(name_bytes)
+            palette.extend(take_strings(palette_count, palette_bytes))
+            for key, n in (("patch_rows", patch_count), ("patch_starts", patch_count), ("patch_ends", patch_count),
+                           ("preds", edge_count), ("succs", edge_count), ("codes", edge_count)):
+                edits[key].append(take("<i4", n))
+            if version >= 4:
+                capacities.extend(take("<f8", resource_count).tolist())
+                resource_names.extend(take_strings(resource_count, resource_bytes))
+                edits["assigned_rows"].append(take("<i4", assignment_count))
+                edits["resource_ids"].append(take("<i4", assignment_count))
+                edits["units"].append(take("<i8", assignment_count))
+
+        # a single segment stays a zero-copy view of the file; appended segments are joined once
+        arrays = {key: parts[0] if len(parts) == 1 else np.concatenate(parts) if parts else np.empty(0, dtype=dtypes[key])
+                  for key, parts in columns.items()}
+        edits = {key: np.concatenate(parts).astype(np.int64) if parts else np.empty(0, dtype=np.int64)
+                 for key, parts in edits.items()}
+        # date patches only come with appended segments, so the columns are already copies;
+        # a later patch of the same row wins
+        arrays["starts"][edits["patch_rows"]] = edits["patch_starts"]
+        arrays["ends"][edits["patch_rows"]] = edits["patch_ends"]
+        tasks = TaskStore.from_columns(arrays["starts"], arrays["ends"], arrays["colors"], arrays["name_ids"],
+                                       names, palette)
+
+        project.segment_count = segment_count
+        project.length = length
+        project.version = version
+        keys = edits["preds"] << 32 | edits["succs"]
+        order = np.argsort(keys)
+        project.mark_written(tasks, arrays["parents"].astype(np.int64) if "parents" in arrays
+                             else np.full(len(tasks), ROOT, dtype=np.int64), (keys[order], edits["codes"][order]),
+                             (resource_names, capacities,
+                              (edits["assigned_rows"], edits["resource_ids"], edits["units"])))
+        return project, tasks
+
+    def restore_tree(self, tree):
+        # rebuilds the saved work-breakdown structure on a freshly opened project,
+        # whose task ids are the file rows the parents refer to
+        linked = np.flatnonzero(self.parents != ROOT)
+        if len(linked):
+            tasks = tree.tasks
+            starts, ends = tasks.starts[:tasks.size].copy(), tasks.ends[:tasks.size].copy()
+            tree.set_parents(linked, self.parents[linked])
+            # summaries were saved rolled up; only a span that really moved needs saving
+            tasks.edited[:tasks.size] &= (tasks.starts[:tasks.size] != starts) | (tasks.ends[:tasks.size] != ends)
+
+    def restore_dependencies(self, schedule):
+        if len(self.edge_keys):
+            schedule.add_dependencies(self.edge_keys >> 32, self.edge_keys & 0xFFFFFFFF,
+                                      [DEPENDENCY_KINDS[code & 3] for code in self.edge_codes.tolist()],
+                                      self.edge_codes >> 2)
+
+    def restore_resources(self, pool):
+        for name, capacity in zip(self.resource_names, self.capacities):
+            pool.add_resource(name, capacity)
+        rows, resource_ids, units = self.assignments
+        if len(rows):
+            pool.extend(rows, resource_ids, units / UNIT_SCALE)
+
+    def mark_written(self, tasks, parents, edges, resources):
+        # file rows are the live tasks below written_end; names and palette keep the store's ids
+        self.written_end = tasks.size
+        self.written_count = tasks.count
+        self.name_count = len(tasks.names)
+        self.palette_count = len(tasks.palette)
+        self.parents = parents
+        self.edge_keys, self.edge_codes = edges
+        self.resource_names, self.capacities, self.assignments = resources
+        tasks.edited[:tasks.size] = False
+
+    def can_append(self, tasks, tree=None, schedule=None, pool=None):
+        written = np.arange(self.written_end)
+        written = written[tasks.alive[written]]
+        if not (
+            self.segment_count > 0
+            and self.version == VERSION
+            and os.path.exists(self.path)
+            and len(written) == self.written_count
+            # once most saved rows changed, rewriting costs no more than patching them
+            and 2 * int(tasks.edited[written].sum()) <= self.written_count
+        ):
+            return False
+        # a written task moved to another parent, or a removed or changed dependency,
+        # can only be saved by a rewrite
+        if not np.array_equal(_file_parents(tasks, tree, written), self.parents):
+            return False
+        keys, codes = _file_edges(tasks, schedule)
+        found = np.searchsorted(keys, self.edge_keys)
+        if not ((found < len(keys)).all() and np.array_equal(keys[found], self.edge_keys)
+                and np.array_equal(codes[found], self.edge_codes)):
+            return False
+        # resources and assignments only ever grow by appending; a changed capacity or a
+        # removed assignment of a saved row needs a rewrite
+        count = len(self.capacities)
+        names = [] if pool is None else pool.names
+        capacities = [] if pool is None else pool.capacities
+        assignments = _file_assignments(tasks, pool)
+        return (names[:count] == self.resource_names and capacities[:count] == self.capacities
+                and all(np.array_equal(column[:len(written)], written)
+                        for column, written in zip(assignments, self.assignments)))
+
+    def save(self, tasks, tree=None, schedule=None, pool=None):
+        if self.can_append(tasks, tree, schedule, pool):
+            self.append(tasks, tree, schedule, pool)
+        else:
+            self.write(tasks, tree, schedule, pool)
+
+    def write(self, tasks, tree=None, schedule=None, pool=None):
+        # everything is rewritten into a temp file that replaces the old one in a single rename
+        tasks.detach()
+        self.close()
+        ids = tasks.ids()
+        parents = _file_parents(tasks, tree, ids)
+        edges = _file_edges(tasks, schedule)
+        empty = np.empty(0, dtype=np.int64)
+        resources = ([] if pool is None else list(pool.names), [] if pool is None else list(pool.capacities),
+                     _file_assignments(tasks, pool))
+        segment = _segment_bytes(tasks, ids, parents, 0, 0, (empty, empty), edges, resources)
+        partial = self.path + ".part"
+        with open(partial, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, 1, HEADER.size + len(segment)))
+            f.write(segment)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, self.path)
+
+        self.segment_count = 1
+        self.length = HEADER.size + len(segment)
+        self.version = VERSION
+        self.mark_written(tasks, parents, edges, resources)
+
+    def append(self, tasks, tree=None, schedule=None, pool=None):
+        # new rows, new names and colors, the new dates of saved rows, the new dependencies,
+        # resources and assignments
+        ids = np.arange(self.written_end, tasks.size)
+        ids = ids[tasks.alive[ids]]
+        patch_ids = np.flatnonzero(tasks.edited[:self.written_end] & tasks.alive[:self.written_end])
+        keys, codes = _file_edges(tasks, schedule)
+        added = ~np.isin(keys, self.edge_keys, assume_unique=True)
+        names = [] if pool is None else list(pool.names)
+        capacities = [] if pool is None else list(pool.capacities)
+        assignments = _file_assignments(tasks, pool)
+        resource_count, assignment_count = len(self.capacities), len(self.assignments[0])
+        if (not len(ids) and not len(patch_ids) and not added.any() and len(tasks.names) == self.name_count
+                and len(tasks.palette) == self.palette_count and len(names) == resource_count
+                and len(assignments[0]) == assignment_count):
+            return
+        parents = _file_parents(tasks, tree, ids)
+        patches = (_file_rows(tasks)[patch_ids], patch_ids)
+        segment = _segment_bytes(tasks, ids, parents, self.name_count, self.palette_count, patches,
+                                 (keys[added], codes[added]),
+                                 (names[resource_count:], capacities[resource_count:],
+                                  tuple(column[assignment_count:] for column in assignments)))
+        with open(self.path, "r+b") as f:
+            # the new segment only becomes visible once the header is rewritten after it is on disk
+            f.seek(self.length)
+            f.write(segment)
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, 0, self.segment_count + 1, self.length + len(segment)))
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.segment_count += 1
+        self.length += len(segment)
+        self.mark_written(tasks, np.concatenate([self.parents, parents]), (keys, codes),
+                          (names, capacities, assignments))
+
+    def close(self):
+        self.mapping = None
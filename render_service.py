@@ -0,0 +1,396 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, urlsplit
+
+from matplotlib.colors import is_color_like
+
+from gantt_cli import parse_tasks
+from gantt_render import figure_size
+
+# bump when the rendered output changes, so old cache entries are never served
+RENDER_VERSION = 2
+CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+DEFAULT_DPI = 100
+MAX_DPI = 300
+MAX_TASKS = 5000
+# a PNG is drawn into one RGBA buffer of 4 bytes per pixel in the worker; this keeps it near 256 MB
+MAX_PIXELS = 64 * 2 ** 20
+MAX_BODY_BYTES = 16 * 2 ** 20
+MAX_HEADER_BYTES = 64 * 2 ** 10
+READ_TIMEOUT = 30
+STAGING_DIR = "staging"
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def render_entry(rows, fmt, dpi, path):
+    # runs in a worker process; the chart is written straight into the cache's staging
+    # directory so the image never travels back through the pool's pipe
+    from gantt_render import render_to_file
+    from task_store import TaskStore
+    tasks = TaskStore(capacity=max(len(rows), 1))
+    for name, start, end, color in rows:
+        tasks.append(name, start, end, color)
+    render_to_file(tasks, path, dpi=dpi)
+    return os.path.getsize(path)
+
+
+def request_key(rows, fmt, dpi):
+    # the same tasks, format and dpi always give the same key, however the JSON was spelled
+    canonical = json.dumps([RENDER_VERSION, fmt, dpi, rows], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ChartCache:
+    # Rendered charts on disk, one file per content hash. Recency lives in an OrderedDict and
+    # in the files' mtimes, so the LRU order survives a restart; once the total size passes
+    # max_bytes the least recently served files are deleted.
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(os.path.join(directory, STAGING_DIR), exist_ok=True)
+        for name in os.listdir(os.path.join(directory, STAGING_DIR)):
+            os.remove(os.path.join(directory, STAGING_DIR, name))
+        files = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            key, _, fmt = name.partition(".")
+            if fmt in CONTENT_TYPES and os.path.isfile(path):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self.entries[name] = size
+            self.size += size
+        self.evict()
+
+    def path(self, key, fmt):
+        return os.path.join(self.directory, f"{key}.{fmt}")
+
+    def staging_path(self, key, fmt):
+        return os.path.join(self.directory, STAGING_DIR, f"{key}.{fmt}")
+
+    def get(self, key, fmt):
+        name = f"{key}.{fmt}"
+        if name not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(name)
+        path = self.path(key, fmt)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # removed behind our back; render it again
+            self.size -= self.entries.pop(name)
+            return None
+        return path
+
+    def commit(self, key, fmt, size):
+        name = f"{key}.{fmt}"
+        os.replace(self.staging_path(key, fmt), self.path(key, fmt))
+        self.size += size - self.entries.pop(name, 0)
+        self.entries[name] = size
+        self.evict()
+
+    def evict(self):
+        # the newest entry is kept even when it alone is larger than the cache
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            name, size = self.entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class RenderService:
+    # POST /render?format=png|svg&dpi=N with a JSON task list, the same shape as the project
+    # files gantt_cli.py reads, answers with the chart; GET /health reports the cache and queue.
+    def __init__(self, cache, workers, max_pending):
+        self.cache = cache
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.renders = 0
+        self.pool_restarts = 0
+        self.inflight = {}
+        self.pool = self.new_pool()
+        self.started = time.time()
+
+    def new_pool(self):
+        # spawned rather than forked workers, the same as the paged export
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def replace_pool(self, broken):
+        # a worker that died (killed, out of memory) breaks the whole pool and fails every
+        # job in it; the first of those jobs to get here starts a new pool for all of them
+        if self.pool is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.pool = self.new_pool()
+            self.pool_restarts += 1
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    def parse_request(self, query, body):
+        params = parse_qs(query)
+        fmt = params.get("format", ["png"])[-1].lower()
+        if fmt not in CONTENT_TYPES:
+            raise HttpError(400, f"فرمت نامعتبر: {fmt}")
+        try:
+            dpi = int(params.get("dpi", [DEFAULT_DPI])[-1])
+        except ValueError:
+            raise HttpError(400, "مقدار dpi باید عدد صحیح باشد")
+        if not 10 <= dpi <= MAX_DPI:
+            raise HttpError(400, f"مقدار dpi باید بین 10 و {MAX_DPI} باشد")
+        try:
+            data = json.loads(body.decode("utf-8"))
+            rows = parse_tasks(data, "درخواست")
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HttpError(400, f"JSON نامعتبر: {e}")
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        if not rows:
+            raise HttpError(400, "تسکی برای نمایش وجود ندارد")
+        if len(rows) > MAX_TASKS:
+            raise HttpError(413, f"حداکثر {MAX_TASKS} تسک در هر درخواست پذیرفته می‌شود")
+        if fmt == "png":
+            width, height = figure_size(len(rows))
+            if width * height * dpi * dpi > MAX_PIXELS:
+                raise HttpError(413, f"تصویر {len(rows)} تسک با dpi={dpi} بیش از حد بزرگ است؛ "
+                                     "dpi کمتر یا فرمت svg را امتحان کنید")
+        for number, (_, _, _, color) in enumerate(rows, 1):
+            if not is_color_like(color):
+                raise HttpError(400, f"درخواست: تسک {number}: رنگ نامعتبر ({color})")
+        return rows, fmt, dpi
+
+    async def render(self, key, rows, fmt, dpi):
+        path = self.cache.get(key, fmt)
+        if path is not None:
+            return path, True
+
+        # identical requests that arrive while the chart is rendering wait for the same job
+        future = self.inflight.get(key)
+        if future is None:
+            if self.pending >= self.max_pending:
+                raise HttpError(503, "صف رسم پر است؛ کمی بعد دوباره تلاش کنید")
+            self.pending += 1
+            future = asyncio.ensure_future(self.render_job(key, rows, fmt, dpi))
+            self.inflight[key] = future
+        return await asyncio.shield(future), False
+
+    async def render_job(self, key, rows, fmt, dpi):
+        try:
+            loop = asyncio.get_running_loop()
+            # a broken pool is replaced and the chart tried once more, in case another
+            # request's worker took the pool down; a second failure only fails this request
+            for attempt in range(2):
+                pool = self.pool
+                try:
+                    size = await loop.run_in_executor(pool, render_entry, rows, fmt, dpi,
+                                                      self.cache.staging_path(key, fmt))
+                    break
+                except BrokenProcessPool:
+                    self.replace_pool(pool)
+                    if attempt:
+                        raise HttpError(503, "پردازش رسم نمودار متوقف شد؛ کمی بعد دوباره تلاش کنید")
+            self.cache.commit(key, fmt, size)
+            self.renders += 1
+            return self.cache.path(key, fmt)
+        finally:
+            self.pending -= 1
+            del self.inflight[key]
+
+    def health(self):
+        return {
+            "status": "ok",
+            "uptime": round(time.time() - self.started, 1),
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "renders": self.renders,
+            "pool_restarts": self.pool_restarts,
+            "cache": self.cache.stats(),
+        }
+
+    async def handle(self, method, target, headers, body):
+        url = urlsplit(target)
+        if url.path == "/health":
+            if method != "GET":
+                raise HttpError(405, "فقط GET پذیرفته می‌شود")
+            return 200, {"Content-Type": "application/json; charset=utf-8"}, json_body(self.health())
+        if url.path != "/render":
+            raise HttpError(404, f"مسیر نامعتبر: {url.path}")
+        if method != "POST":
+            raise HttpError(405, "فقط POST پذیرفته می‌شود")
+
+        rows, fmt, dpi = self.parse_request(url.query, body)
+        key = request_key(rows, fmt, dpi)
+        response_headers = {"ETag": f'"{key}"', "Cache-Control": "public, max-age=31536000, immutable"}
+        if headers.get("if-none-match") == f'"{key}"':
+            # the key is a hash of the content, so the client's copy is current without rendering
+            return 304, response_headers, b""
+        path, hit = await self.render(key, rows, fmt, dpi)
+        loop = asyncio.get_running_loop()
+        try:
+            content = await loop.run_in_executor(None, read_file, path)
+        except FileNotFoundError:
+            # evicted between the lookup and the read by a burst of newer charts
+            path, hit = await self.render(key, rows, fmt, dpi)
+            content = await loop.run_in_executor(None, read_file, path)
+        response_headers["X-Cache"] = "hit" if hit else "miss"
+        response_headers["Content-Type"] = CONTENT_TYPES[fmt]
+        return 200, response_headers, content
+
+    async def serve_client(self, reader, writer):
+        # HTTP/1.1 with keep-alive; one request at a time per connection
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), READ_TIMEOUT)
+                except HttpError as e:
+                    await write_response(writer, e.status, {"Content-Type": "application/json; charset=utf-8"},
+                                         json_body({"error": str(e)}), False)
+                    return
+                if request is None:
+                    return
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    status, response_headers, content = await self.handle(method, target, headers, body)
+                except HttpError as e:
+                    status, response_headers, content = (e.status, {"Content-Type": "application/json; charset=utf-8"},
+                                                         json_body({"error": str(e)}))
+                except Exception as e:
+                    print(f"Error rendering {target}: {e!r}", file=sys.stderr)
+                    status, response_headers, content = (500, {"Content-Type": "application/json; charset=utf-8"},
+                                                         json_body({"error": f"خطا در تولید نمودار: {e}"}))
+                await write_response(writer, status, response_headers, content, keep_alive)
+                if not keep_alive:
+                    return
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def json_body(data):
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+async def read_request(reader):
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise HttpError(400, "درخواست ناقص است")
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(413, "سرآیند درخواست بیش از حد بزرگ است")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "خط درخواست نامعتبر است")
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HttpError(400, "Transfer-Encoding: chunked پشتیبانی نمی‌شود")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(400, "Content-Length نامعتبر است")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, "بدنه‌ی درخواست بیش از حد بزرگ است")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+async def write_response(writer, status, headers, content, keep_alive):
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Length: {len(content)}",
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + content)
+    await writer.drain()
+
+
+async def serve(args):
+    cache = ChartCache(args.cache_dir, args.cache_size * 2 ** 20)
+    workers = args.workers or os.cpu_count()
+    service = RenderService(cache, workers, args.max_pending or 4 * workers)
+    server = await asyncio.start_server(service.serve_client, args.host, args.port, limit=MAX_HEADER_BYTES)
+    try:
+        # stop cleanly on SIGTERM too, so the worker processes are shut down with the service
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, server.close)
+    except NotImplementedError:
+        pass
+    print(f"Serving on http://{args.host}:{args.port} ({workers} workers, cache {cache.stats()['entries']} charts "
+          f"in {args.cache_dir})", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Persian Gantt charts over HTTP for other local tools.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("-j", "--workers", type=int, default=0, help="render processes (0 = one per CPU core)")
+    parser.add_argument("--max-pending", type=int, default=0,
+                        help="renders queued or running before requests get 503 (0 = 4 per worker)")
+    parser.add_argument("--cache-dir", default="chart_cache")
+    parser.add_argument("--cache-size", type=int, default=512, help="cache size in MB")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+import numpy as np
+
+INITIAL_CAPACITY = 64
+DEFAULT_CAPACITY = 1.0
+# loads are summed in thousandths of a unit so the running sums stay exact
+UNIT_SCALE = 1000
+MAX_LEVELING_PASSES = 50
+
+
+class ResourcePool:
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self.names = []
+        self.capacities = []
+        self._index = {}
+        self.size = 0
+        self.task_ids = np.empty(capacity, dtype=np.int32)
+        self.resource_ids = np.empty(capacity, dtype=np.int32)
+        self.units = np.empty(capacity, dtype=np.int64)
+        self.version = 0
+
+    def __len__(self):
+        return self.size
+
+    def add_resource(self, name, capacity=DEFAULT_CAPACITY):
+        resource_id = self._index.get(name)
+        if resource_id is None:
+            resource_id = self._index[name] = len(self.names)
+            self.names.append(name)
+            self.capacities.append(float(capacity))
+        else:
+            self.capacities[resource_id] = float(capacity)
+        self.version += 1
+        return resource_id
+
+    def resource_id(self, name):
+        resource_id = self._index.get(name)
+        if resource_id is None:
+            resource_id = self.add_resource(name)
+        return resource_id
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        capacity = len(self.task_ids)
+        if needed <= capacity:
+            return
+        capacity = max(capacity, INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+        for column in ('task_ids', 'resource_ids', 'units'):
+            old = getattr(self, column)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, column, new)
+
+    def assign(self, task_id, resource_id, units=1.0):
+        if units <= 0:
+            raise ValueError(f"مقدار تخصیص منبع باید مثبت باشد: {units}")
+        self.extend([task_id], [resource_id], [units])
+
+    def extend(self, task_ids, resource_ids, units):
+        n = len(task_ids)
+        self._reserve(n)
+        first = self.size
+        self.task_ids[first:first + n] = task_ids
+        self.resource_ids[first:first + n] = resource_ids
+        self.units[first:first + n] = np.round(np.asarray(units, dtype=np.float64) * UNIT_SCALE)
+        self.size += n
+        self.version += 1
+
+    def unassign(self, task_id):
+        keep = self.task_ids[:self.size] != task_id
+        kept = int(keep.sum())
+        if kept == self.size:
+            return
+        for column in ('task_ids', 'resource_ids', 'units'):
+            values = getattr(self, column)
+            values[:kept] = values[:self.size][keep]
+        self.size = kept
+        self.version += 1
+
+    def assignments(self, task_id):
+        rows = np.flatnonzero(self.task_ids[:self.size] == task_id)
+        return [(self.names[self.resource_ids[row]], self.units[row] / UNIT_SCALE) for row in rows.tolist()]
+
+    def snapshot(self):
+        copy = ResourcePool(capacity=max(self.size, 1))
+        copy.names = list(self.names)
+        copy.capacities = list(self.capacities)
+        copy._index = dict(self._index)
+        copy.extend(self.task_ids[:self.size], self.resource_ids[:self.size], self.units[:self.size] / UNIT_SCALE)
+        return copy
+
+
+class ResourceLoad:
+    # Step curves of every resource: from days[i] up to next_days[i] - 1 resource
+    # resources[i] carries loads[i] units. Built with one sort of the +units/-units
+    # events, so the cost does not depend on how many days the tasks span.
+    def __init__(self, tasks, pool):
+        n = pool.size
+        task_ids = pool.task_ids[:n]
+        live = tasks.alive[task_ids]
+        task_ids = task_ids[live]
+        resources = pool.resource_ids[:n][live].astype(np.int64)
+        units = pool.units[:n][live]
+
+        days = np.concatenate([tasks.starts[task_ids], tasks.ends[task_ids] + 1]).astype(np.int64)
+        resources = np.concatenate([resources, resources])
+        deltas = np.concatenate([units, -units])
+        key = (resources << 32) | days
+        order = np.argsort(key, kind='stable')
+        key = key[order]
+        first = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+
+        self.resources = resources[order][first]
+        self.days = days[order][first]
+        # every resource's events sum to zero, so one running sum covers all of them
+        self.loads = np.cumsum(np.add.reduceat(deltas[order], first)) / UNIT_SCALE if len(first) else np.empty(0)
+        last = np.r_[self.resources[1:] != self.resources[:-1], True]
+        self.next_days = np.where(last, self.days, np.r_[self.days[1:], 0])
+        capacities = np.asarray(pool.capacities + [0.0])
+        self.capacities = capacities[self.resources]
+
+    def curve(self, resource_id):
+        first, last = np.searchsorted(self.resources, [resource_id, resource_id + 1])
+        return self.days[first:last], self.loads[first:last]
+
+    def overloads(self):
+        # consecutive over-allocated steps of the same resource are merged into one interval
+        over = self.loads > self.capacities + 1e-9
+        starts = over & ~np.r_[False, over[:-1] & (self.resources[1:] == self.resources[:-1])]
+        ends = over & ~np.r_[over[1:] & (self.resources[1:] == self.resources[:-1]), False]
+        first = np.flatnonzero(starts)
+        last = np.flatnonzero(ends)
+        bounds = np.empty(2 * len(first), dtype=np.intp)
+        bounds[0::2] = first
+        bounds[1::2] = last + 1
+        peaks = np.maximum.reduceat(np.r_[self.loads, 0.0], bounds)[0::2] if len(first) else np.empty(0)
+        return self.resources[first], self.days[first], self.next_days[last] - 1, peaks
+
+    def total(self):
+        if not len(self.days):
+            return self.days, self.loads
+        first_of_resource = np.r_[True, self.resources[1:] != self.resources[:-1]]
+        deltas = np.where(first_of_resource, self.loads, self.loads - np.r_[0.0, self.loads[:-1]])
+        order = np.argsort(self.days, kind='stable')
+        days = self.days[order]
+        first = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        return days[first], np.round(np.cumsum(np.add.reduceat(deltas[order], first)), 6)
+
+    def overloaded_days(self):
+        resources, starts, ends, _ = self.overloads()
+        if not len(starts):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        days = np.concatenate([starts, ends + 1])
+        deltas = np.concatenate([np.ones(len(starts), dtype=np.int64), -np.ones(len(ends), dtype=np.int64)])
+        order = np.argsort(days, kind='stable')
+        days = days[order]
+        first = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        return days[first], np.cumsum(np.add.reduceat(deltas[order], first))
+
+
+def level_resources(tasks, pool, schedule, max_passes=MAX_LEVELING_PASSES):
+    # greedy leveling: each pass moves at most one task per over-allocated resource,
+    # past the end of its earliest overload, and only within the task's slack so the
+    # project finish does not move
+    moved = set()
+    for _ in range(max_passes):
+        resources, starts, ends, _ = ResourceLoad(tasks, pool).overloads()
+        if not len(starts):
+            return len(moved), 0
+        finish = schedule.finish()
+        n = pool.size
+        by_resource = np.argsort(pool.resource_ids[:n], kind='stable')
+        sorted_resources = pool.resource_ids[:n][by_resource]
+
+        changed = False
+        seen = set()
+        for resource, start, end in zip(resources.tolist(), starts.tolist(), ends.tolist()):
+            if resource in seen:
+                continue
+            seen.add(resource)
+            first, last = np.searchsorted(sorted_resources, [resource, resource + 1])
+            candidates = np.unique(pool.task_ids[by_resource[first:last]])
+            # summary tasks follow their children and are never moved themselves
+            candidates = candidates[tasks.alive[candidates] & ~schedule.is_summary(candidates)]
+            active = candidates[(tasks.starts[candidates] <= end) & (tasks.ends[candidates] >= start)]
+            if not len(active):
+                continue
+            shifts = end + 1 - tasks.starts[active].astype(np.int64)
+            slack = schedule.slack(active, finish)
+            movable = shifts <= slack
+            if not movable.any():
+                continue
+            task_id = int(active[movable][np.argmax(slack[movable])])
+            shift = end + 1 - int(tasks.starts[task_id])
+            schedule.set_dates(task_id, int(tasks.starts[task_id]) + shift, int(tasks.ends[task_id]) + shift)
+            moved.add(task_id)
+            changed = True
+        if not changed:
+            break
+    return len(moved), len(ResourceLoad(tasks, pool).overloads()[0])
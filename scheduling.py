@@ -0,0 +1,375 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+FS = "FS"
+SS = "SS"
+FF = "FF"
+DEPENDENCY_KINDS = (FS, SS, FF)
+# an edge is stored as a single int, lag * 4 + kind code, so the adjacency dicts hold no tuples
+KIND_CODES = {FS: 0, SS: 1, FF: 2}
+
+
+def edge_code(kind, lag):
+    if kind not in KIND_CODES:
+        raise ValueError(f"نوع وابستگی نامعتبر است: {kind}")
+    return int(lag) * 4 + KIND_CODES[kind]
+
+
+def edge_kind(code):
+    return DEPENDENCY_KINDS[code & 3], code >> 2
+
+
+class Schedule:
+    # Critical-path scheduling over the tasks of a TaskStore, indexed by task id.
+    # starts are the early starts; tails[v] is the time from v's late start to the
+    # project finish, so late dates never have to be shifted when the finish moves.
+    # Summary tasks (summaries(ids) -> bool mask, e.g. TaskTree.is_summary) take no part in
+    # the finish, slack or critical path; their dates belong to the hierarchy.
+    def __init__(self, tasks, on_commit=None, summaries=None):
+        self.tasks = tasks
+        self.on_commit = on_commit
+        self.summaries = summaries
+        self.anchors = []
+        self.durations = []
+        self.starts = []
+        self.tails = []
+        self.order = []
+        self.succ = []
+        self.pred = []
+        self.alive = np.empty(0, dtype=np.bool_)
+        self.edge_count = 0
+        self.next_position = 0
+        self.sync()
+
+    def __len__(self):
+        return self.edge_count
+
+    def sync(self):
+        tasks = self.tasks
+        n = len(self.alive)
+        if tasks.size < n:
+            self.__init__(tasks, self.on_commit, self.summaries)
+            return
+
+        if tasks.size > n:
+            starts = tasks.starts[n:tasks.size].tolist()
+            durations = (tasks.ends[n:tasks.size] - tasks.starts[n:tasks.size] + 1).tolist()
+            added = len(starts)
+            self.anchors.extend(starts)
+            self.starts.extend(starts)
+            self.durations.extend(durations)
+            self.tails.extend(durations)
+            self.order.extend(range(self.next_position, self.next_position + added))
+            self.next_position += added
+            self.succ.extend({} for _ in range(added))
+            self.pred.extend({} for _ in range(added))
+            self.alive = np.concatenate([self.alive, tasks.alive[n:tasks.size]])
+
+        removed = np.flatnonzero(self.alive[:n] & ~tasks.alive[:n]).tolist()
+        if removed:
+            forward, backward = [], []
+            for v in removed:
+                self.alive[v] = False
+                for u in self.pred[v]:
+                    del self.succ[u][v]
+                    backward.append(u)
+                for w in self.succ[v]:
+                    del self.pred[w][v]
+                    forward.append(w)
+                self.edge_count -= len(self.pred[v]) + len(self.succ[v])
+                self.pred[v] = {}
+                self.succ[v] = {}
+            self.commit(self.forward(forward))
+            self.backward(backward)
+
+    def check_task(self, task_id):
+        if not 0 <= task_id < len(self.alive) or not self.alive[task_id]:
+            raise ValueError(f"تسک {task_id} وجود ندارد")
+
+    def is_summary(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.summaries is None:
+            return np.zeros(len(ids), dtype=bool)
+        return np.asarray(self.summaries(ids), dtype=bool)
+
+    def reload(self, ids):
+        # dates set outside the schedule, e.g. a summary rolled up from its children; summary
+        # tasks have no dependencies, so nothing else has to move
+        self.sync()
+        for v in np.asarray(ids).tolist():
+            start = int(self.tasks.starts[v])
+            self.anchors[v] = self.starts[v] = start
+            self.durations[v] = int(self.tasks.ends[v]) - start + 1
+        self.backward(np.asarray(ids).tolist())
+
+    def earliest(self, v):
+        start = self.anchors[v]
+        duration = self.durations[v]
+        starts = self.starts
+        durations = self.durations
+        for u, code in self.pred[v].items():
+            kind = code & 3
+            if kind == 0:
+                candidate = starts[u] + durations[u] + (code >> 2)
+            elif kind == 1:
+                candidate = starts[u] + (code >> 2)
+            else:
+                candidate = starts[u] + durations[u] + (code >> 2) - duration
+            if candidate > start:
+                start = candidate
+        return start
+
+    def tail(self, v):
+        duration = self.durations[v]
+        tail = duration
+        tails = self.tails
+        durations = self.durations
+        for w, code in self.succ[v].items():
+            kind = code & 3
+            if kind == 0:
+                candidate = tails[w] + duration + (code >> 2)
+            elif kind == 1:
+                candidate = tails[w] + (code >> 2)
+            else:
+                candidate = tails[w] - durations[w] + duration + (code >> 2)
+            if candidate > tail:
+                tail = candidate
+        return tail
+
+    def forward(self, seeds):
+        # only the downstream subgraph is visited, in topological order, and a node
+        # whose early start does not move stops the propagation
+        order = self.order
+        starts = self.starts
+        seeds = {v for v in seeds if self.alive[v]}
+        heap = [(order[v], v) for v in seeds]
+        heapq.heapify(heap)
+        queued = set(seeds)
+        changed = []
+        while heap:
+            _, v = heapq.heappop(heap)
+            start = self.earliest(v)
+            if start != starts[v]:
+                starts[v] = start
+                changed.append(v)
+            elif v not in seeds:
+                continue
+            for w in self.succ[v]:
+                if w not in queued:
+                    queued.add(w)
+                    heapq.heappush(heap, (order[w], w))
+        return changed
+
+    def backward(self, seeds):
+        order = self.order
+        tails = self.tails
+        seeds = {v for v in seeds if self.alive[v]}
+        heap = [(-order[v], v) for v in seeds]
+        heapq.heapify(heap)
+        queued = set(seeds)
+        while heap:
+            _, v = heapq.heappop(heap)
+            tail = self.tail(v)
+            if tail != tails[v]:
+                tails[v] = tail
+            elif v not in seeds:
+                continue
+            for u in self.pred[v]:
+                if u not in queued:
+                    queued.add(u)
+                    heapq.heappush(heap, (-order[u], u))
+
+    def commit(self, changed):
+        if not changed:
+            return
+        ids = np.array(sorted(set(changed)))
+        starts = np.array([self.starts[v] for v in ids.tolist()])
+        durations = np.array([self.durations[v] for v in ids.tolist()])
+        self.tasks.set_dates(ids, starts, starts + durations - 1)
+        if self.on_commit is not None:
+            self.on_commit(ids)
+
+    def reorder(self, pred, succ):
+        # Pearce-Kelly: only the nodes between the two positions are renumbered;
+        # reaching pred from succ means the new edge closes a cycle
+        order = self.order
+        lower, upper = order[succ], order[pred]
+        forward = {succ}
+        stack = [succ]
+        while stack:
+            v = stack.pop()
+            for w in self.succ[v]:
+                if w == pred:
+                    raise ValueError("این وابستگی یک حلقه ایجاد می‌کند")
+                if w not in forward and order[w] < upper:
+                    forward.add(w)
+                    stack.append(w)
+
+        backward = {pred}
+        stack = [pred]
+        while stack:
+            v = stack.pop()
+            for u in self.pred[v]:
+                if u not in backward and order[u] > lower:
+                    backward.add(u)
+                    stack.append(u)
+
+        nodes = sorted(backward, key=order.__getitem__) + sorted(forward, key=order.__getitem__)
+        for v, position in zip(nodes, sorted(order[v] for v in nodes)):
+            order[v] = position
+
+    def add_dependency(self, pred, succ, kind=FS, lag=0):
+        self.sync()
+        code = edge_code(kind, lag)
+        self.check_task(pred)
+        self.check_task(succ)
+        if pred == succ:
+            raise ValueError("یک تسک نمی‌تواند به خودش وابسته باشد")
+        if self.order[pred] > self.order[succ]:
+            self.reorder(pred, succ)
+
+        if succ not in self.succ[pred]:
+            self.edge_count += 1
+        self.succ[pred][succ] = self.pred[succ][pred] = code
+        self.commit(self.forward([succ]))
+        self.backward([pred])
+
+    def add_dependencies(self, preds, succs, kinds=None, lags=None):
+        # bulk load: one O(V+E) topological pass instead of per-edge reordering
+        self.sync()
+        preds = np.asarray(preds, dtype=np.int64)
+        succs = np.asarray(succs, dtype=np.int64)
+        for ids in (preds, succs):
+            outside = (ids < 0) | (ids >= len(self.alive))
+            if outside.any() or not self.alive[ids].all():
+                missing = ids[outside][0] if outside.any() else ids[~self.alive[ids]][0]
+                raise ValueError(f"تسک {missing} وجود ندارد")
+        if (preds == succs).any():
+            raise ValueError("یک تسک نمی‌تواند به خودش وابسته باشد")
+        codes = np.zeros(len(preds), dtype=np.int64) if lags is None else np.asarray(lags, dtype=np.int64) * 4
+        if kinds is not None:
+            codes += [edge_code(kind, 0) for kind in kinds]
+
+        added = []
+        succ_lists = self.succ
+        pred_lists = self.pred
+        for pred, succ, code in zip(preds.tolist(), succs.tolist(), codes.tolist()):
+            if succ not in succ_lists[pred]:
+                added.append((pred, succ))
+            succ_lists[pred][succ] = pred_lists[succ][pred] = code
+        self.edge_count += len(added)
+
+        try:
+            self.rebuild()
+        except ValueError:
+            for pred, succ in added:
+                del succ_lists[pred][succ]
+                del pred_lists[succ][pred]
+            self.edge_count -= len(added)
+            raise
+
+    def rebuild(self):
+        alive = np.flatnonzero(self.alive).tolist()
+        indegree = [len(pred) for pred in self.pred]
+        queue = deque(v for v in alive if not indegree[v])
+        topological = []
+        while queue:
+            v = queue.popleft()
+            topological.append(v)
+            for w in self.succ[v]:
+                indegree[w] -= 1
+                if not indegree[w]:
+                    queue.append(w)
+        if len(topological) < len(alive):
+            raise ValueError("وابستگی‌ها یک حلقه ایجاد می‌کنند")
+
+        for position, v in enumerate(topological):
+            self.order[v] = position
+        self.next_position = len(self.order)
+
+        changed = []
+        starts = self.starts
+        for v in topological:
+            start = self.earliest(v)
+            if start != starts[v]:
+                starts[v] = start
+                changed.append(v)
+        for v in reversed(topological):
+            self.tails[v] = self.tail(v)
+        self.commit(changed)
+
+    def remove_dependency(self, pred, succ):
+        self.sync()
+        if succ not in self.succ[pred]:
+            return
+        del self.succ[pred][succ]
+        del self.pred[succ][pred]
+        self.edge_count -= 1
+        self.commit(self.forward([succ]))
+        self.backward([pred])
+
+    def set_dates(self, task_id, start, end):
+        self.sync()
+        self.check_task(task_id)
+        if hasattr(start, 'toordinal'):
+            start = start.toordinal()
+        if hasattr(end, 'toordinal'):
+            end = end.toordinal()
+        if end < start:
+            raise ValueError("تاریخ پایان نمی‌تواند قبل از تاریخ شروع باشد")
+        if self.is_summary([task_id])[0]:
+            raise ValueError("تاریخ تسک خلاصه از زیرتسک‌هایش محاسبه می‌شود و قابل ویرایش نیست")
+
+        duration = end - start + 1
+        resized = duration != self.durations[task_id]
+        self.anchors[task_id] = start
+        self.durations[task_id] = duration
+        self.commit(self.forward([task_id]) + [task_id])
+        if resized:
+            self.backward([task_id])
+
+    def predecessors(self, task_id):
+        return {u: edge_kind(code) for u, code in self.pred[task_id].items()}
+
+    def successors(self, task_id):
+        return {w: edge_kind(code) for w, code in self.succ[task_id].items()}
+
+    def edges(self):
+        # every dependency as (preds, succs, codes) arrays, e.g. to save the project
+        self.sync()
+        preds, succs, codes = [], [], []
+        for u, succ in enumerate(self.succ):
+            if succ:
+                preds.extend([u] * len(succ))
+                succs.extend(succ)
+                codes.extend(succ.values())
+        return (np.array(preds, dtype=np.int64), np.array(succs, dtype=np.int64),
+                np.array(codes, dtype=np.int64))
+
+    def finish(self):
+        ids = np.flatnonzero(self.alive)
+        ids = ids[~self.is_summary(ids)]
+        if not len(ids):
+            return None
+        starts = np.array(self.starts)[ids]
+        durations = np.array(self.durations)[ids]
+        return int((starts + durations - 1).max())
+
+    def slack(self, ids=None, finish=None):
+        self.sync()
+        if finish is None:
+            finish = self.finish()
+        if ids is not None:
+            ids = np.asarray(ids).tolist()
+            tails = np.array([self.tails[v] for v in ids], dtype=np.int64)
+            starts = np.array([self.starts[v] for v in ids], dtype=np.int64)
+            return finish - tails + 1 - starts
+        if finish is None:
+            return np.zeros(len(self.alive), dtype=np.int64)
+        late_starts = finish - np.array(self.tails) + 1
+        return np.where(self.alive, late_starts - np.array(self.starts), 0)
+
+    def critical(self):
+        return self.alive & (self.slack() == 0) & ~self.is_summary(np.arange(len(self.alive)))
@@ -0,0 +1,20 @@
+import sys
+import time
+
+STARTED = time.perf_counter()
+
+
+class StartupTimer:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.last = STARTED
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        elapsed = now - self.last
+        self.phases.append((phase, elapsed))
+        self.last = now
+        if self.enabled:
+            print(f"startup {phase:<16}{elapsed * 1000:8.1f} ms  (total {(now - STARTED) * 1000:.1f} ms)",
+                  file=sys.stderr)
@@ -0,0 +1,217 @@
+import csv
+import json
+import os
+import queue
+import threading
+from itertools import compress, islice
+
+import numpy as np
+from matplotlib.colors import is_color_like
+
+from color_names import COLOR_MAP
+from persian_calendar import parse_jalali_dates
+
+CHUNK_SIZE = 50000
+MAX_REPORTED_ERRORS = 1000
+POLL_INTERVAL_MS = 50
+COLUMNS = ("name", "start", "end", "color")
+DEFAULT_COLOR = "آبی"
+EMPTY_ROW = ("", "", "", "")
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+class ImportReport:
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row, message))
+
+    def summary(self, limit=10):
+        lines = [f"{self.imported} تسک از {self.rows} سطر وارد شد"]
+        if self.error_count:
+            lines.append(f"{self.error_count} سطر خطا داشت:")
+            lines.extend(f"سطر {row}: {message}" for row, message in self.errors[:limit])
+        return "\n".join(lines)
+
+
+def _header_index(header):
+    header = [column.strip().lower() for column in header]
+    for column in COLUMNS[:3]:
+        if column not in header:
+            raise ValueError(f"ستون «{column}» در فایل وجود ندارد")
+    return [header.index(column) if column in header else None for column in COLUMNS]
+
+
+def _columns(rows, index):
+    width = max(i for i in index if i is not None) + 1
+    rows = [row if len(row) >= width else list(row) + [""] * (width - len(row)) for row in rows]
+    return [["" if i is None else row[i] for row in rows] for i in index], None
+
+
+def read_csv_chunks(path, chunk_size):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        index = _header_index(next(reader, []))
+        while rows := list(islice(reader, chunk_size)):
+            yield _columns(rows, index)
+
+
+def read_jsonl_chunks(path, chunk_size):
+    with open(path, encoding="utf-8-sig") as f:
+        lines = (line for line in f if line.strip())
+        while chunk := list(islice(lines, chunk_size)):
+            rows = []
+            malformed = []
+            for line in chunk:
+                try:
+                    item = json.loads(line)
+                    rows.append(["" if item.get(column) is None else str(item[column]) for column in COLUMNS])
+                    malformed.append(False)
+                except (ValueError, AttributeError):
+                    rows.append(EMPTY_ROW)
+                    malformed.append(True)
+            columns, _ = _columns(rows, range(len(COLUMNS)))
+            yield columns, np.array(malformed)
+
+
+def read_xlsx_chunks(path, chunk_size):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("برای خواندن فایل اکسل بسته openpyxl باید نصب باشد")
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        values = workbook.active.iter_rows(values_only=True)
+        index = _header_index([str(value or "") for value in next(values, ())])
+        rows = (["" if value is None else str(value) for value in row] for row in values)
+        while chunk := list(islice(rows, chunk_size)):
+            yield _columns(chunk, index)
+    finally:
+        workbook.close()
+
+
+CHUNK_READERS = {
+    ".csv": read_csv_chunks,
+    ".jsonl": read_jsonl_chunks,
+    ".ndjson": read_jsonl_chunks,
+    ".xlsx": read_xlsx_chunks,
+}
+
+
+def resolve_colors(texts):
+    colors = {}
+    for text in set(texts):
+        color = COLOR_MAP.get(text.strip() or DEFAULT_COLOR, text.strip())
+        colors[text] = color if is_color_like(color) else None
+    return [colors[text] for text in texts]
+
+
+def parse_chunk(columns, malformed, first_row, report):
+    name_texts, start_texts, end_texts, color_texts = columns
+    n = len(name_texts)
+    if malformed is None:
+        malformed = np.zeros(n, dtype=bool)
+    names = [name.strip() for name in name_texts]
+    starts, start_valid = parse_jalali_dates(start_texts)
+    ends, end_valid = parse_jalali_dates(end_texts)
+    colors = resolve_colors(color_texts)
+
+    has_name = np.array([bool(name) for name in names])
+    has_color = np.array([color is not None for color in colors])
+    ordered = ends >= starts
+    valid = ~malformed & has_name & start_valid & end_valid & ordered & has_color
+
+    for i in np.flatnonzero(~valid).tolist():
+        if malformed[i]:
+            message = "سطر JSON نامعتبر است"
+        elif not has_name[i]:
+            message = "نام تسک نمی‌تواند خالی باشد"
+        elif not start_valid[i]:
+            message = f"فرمت تاریخ شروع نامعتبر است: {start_texts[i]}"
+        elif not end_valid[i]:
+            message = f"فرمت تاریخ پایان نامعتبر است: {end_texts[i]}"
+        elif not ordered[i]:
+            message = "تاریخ پایان نمی‌تواند قبل از تاریخ شروع باشد"
+        else:
+            message = f"رنگ نامعتبر است: {color_texts[i]}"
+        report.add_error(first_row + i, message)
+
+    report.rows += n
+    report.imported += int(valid.sum())
+    if valid.all():
+        return names, starts, ends, colors
+    keep = valid.tolist()
+    return list(compress(names, keep)), starts[valid], ends[valid], list(compress(colors, keep))
+
+
+def parse_file(path, report, chunk_size=CHUNK_SIZE):
+    reader = CHUNK_READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        raise ValueError(f"نوع فایل پشتیبانی نمی‌شود: {path}")
+
+    first_row = 1
+    for columns, malformed in reader(path, chunk_size):
+        yield parse_chunk(columns, malformed, first_row, report)
+        first_row += len(columns[0])
+
+
+def import_file(path, tasks, chunk_size=CHUNK_SIZE):
+    report = ImportReport(path)
+    for chunk in parse_file(path, report, chunk_size):
+        tasks.extend(*chunk)
+    return report
+
+
+class BackgroundImport:
+    def __init__(self, root, path, tasks, on_chunk, on_done, chunk_size=CHUNK_SIZE):
+        self.root = root
+        self.tasks = tasks
+        self.on_chunk = on_chunk
+        self.on_done = on_done
+        self.report = ImportReport(path)
+        self.cancelled = threading.Event()
+        # parsed chunks wait here until the Tk thread appends them; bounded to cap memory
+        self.chunks = queue.Queue(maxsize=4)
+        self.thread = threading.Thread(target=self.work, args=(path, chunk_size), daemon=True)
+        self.thread.start()
+        self.root.after(POLL_INTERVAL_MS, self.poll)
+
+    def work(self, path, chunk_size):
+        try:
+            for chunk in parse_file(path, self.report, chunk_size):
+                if self.cancelled.is_set():
+                    break
+                self.chunks.put(chunk)
+            self.chunks.put(None)
+        except Exception as e:
+            self.chunks.put(e)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def poll(self):
+        try:
+            item = self.chunks.get_nowait()
+        except queue.Empty:
+            self.root.after(POLL_INTERVAL_MS, self.poll)
+            return
+
+        if item is None or isinstance(item, Exception):
+            # chunks dropped after cancel() were still counted in the report, so it is not a result
+            self.on_done(self.report, ImportCancelled() if self.cancelled.is_set() else item)
+            return
+        if not self.cancelled.is_set():
+            self.tasks.extend(*item)
+            self.on_chunk(self.report)
+        self.root.after(1, self.poll)
@@ -0,0 +1,176 @@
+import customtkinter as ctk
+
+from persian_calendar import jalali_label
+
+ROW_HEIGHT = 36
+ROW_PADDING = 2
+INDENT = "    "
+
+
+class TaskRow(ctk.CTkFrame):
+    def __init__(self, master, on_delete, on_edit, on_toggle):
+        super().__init__(master, height=ROW_HEIGHT - ROW_PADDING)
+        self.grid_propagate(False)
+        self.task = None
+
+        for i in range(5):
+            self.grid_columnconfigure(i, weight=1)
+
+        self.name_label = ctk.CTkLabel(self, text="", width=200, anchor="w", font=("B-NAZANIN", 14))
+        self.name_label.grid(row=0, column=0, padx=5, sticky="e")
+
+        self.start_label = ctk.CTkLabel(self, text="", anchor="w", font=("B-NAZANIN", 14))
+        self.start_label.grid(row=0, column=1, padx=5, sticky="e")
+
+        self.end_label = ctk.CTkLabel(self, text="", anchor="w", font=("B-NAZANIN", 14))
+        self.end_label.grid(row=0, column=2, padx=5, sticky="e")
+
+        self.duration_label = ctk.CTkLabel(self, text="", anchor="w", font=("B-NAZANIN", 14))
+        self.duration_label.grid(row=0, column=3, padx=5, sticky="e")
+
+        self.color_frame = ctk.CTkFrame(self, width=20, height=20, corner_radius=3)
+        self.color_frame.grid(row=0, column=4, padx=5, sticky="e")
+
+        self.delete_btn = ctk.CTkButton(
+            self,
+            text="✕",
+            width=30,
+            fg_color="transparent",
+            hover_color="#D35B58",
+            text_color=("gray10", "gray90"),
+            command=lambda: on_delete(self.task),
+            font=("B-NAZANIN", 14)
+        )
+        self.delete_btn.grid(row=0, column=5, padx=5, sticky="e")
+
+        self.edit_btn = ctk.CTkButton(
+            self,
+            text="✎",
+            width=30,
+            fg_color="transparent",
+            hover_color="#3B8ED0",
+            text_color=("gray10", "gray90"),
+            command=lambda: on_edit(self.task),
+            font=("B-NAZANIN", 14)
+        )
+        self.edit_btn.grid(row=0, column=6, padx=5, sticky="e")
+
+        self.toggle_btn = ctk.CTkButton(
+            self,
+            text="",
+            width=30,
+            fg_color="transparent",
+            hover_color="#3B8ED0",
+            text_color=("gray10", "gray90"),
+            command=lambda: on_toggle(self.task),
+            font=("B-NAZANIN", 14)
+        )
+        self.toggle_btn.grid(row=0, column=7, padx=5, sticky="e")
+
+    def show(self, tasks, task_id, depth=0, expanded=None):
+        # expanded is None for an ordinary task, True/False for an open/closed summary
+        if self.task is not None and self.task['id'] == task_id:
+            return
+        task = self.task = tasks.get(task_id)
+        self.name_label.configure(text=INDENT * depth + task['name'])
+        if expanded is None:
+            self.toggle_btn.grid_remove()
+        else:
+            self.toggle_btn.configure(text="▾" if expanded else "▸")
+            self.toggle_btn.grid()
+        self.start_label.configure(text=f"شروع: {jalali_label(task['start'].toordinal())}")
+        self.end_label.configure(text=f"پایان: {jalali_label(task['end'].toordinal())}")
+        self.duration_label.configure(text=f"مدت: {task['duration']} روز")
+        self.color_frame.configure(fg_color=task['color'])
+
+
+class TaskListView:
+    def __init__(self, master, tasks, on_delete, on_edit, tree=None, on_toggle=None):
+        self.tasks = tasks
+        self.tree = tree
+        self.on_delete = on_delete
+        self.on_edit = on_edit
+        self.on_toggle = on_toggle
+        self.edits = tasks.edits
+        self.tree_version = None if tree is None else tree.version
+        self.offset = 0
+        self.rows = []
+
+        self.body = ctk.CTkFrame(master)
+        self.body.pack(side="left", fill="both", expand=True)
+
+        self.scrollbar = ctk.CTkScrollbar(master, orientation="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.body.bind('<Configure>', lambda e: self.refresh())
+        self.bind_wheel(self.body)
+
+    def bind_wheel(self, widget):
+        widget.bind('<MouseWheel>', lambda e: self.yview('scroll', -1 if e.delta > 0 else 1, 'units'))
+        widget.bind('<Button-4>', lambda e: self.yview('scroll', -1, 'units'))
+        widget.bind('<Button-5>', lambda e: self.yview('scroll', 1, 'units'))
+
+    def set_tasks(self, tasks, tree=None):
+        self.tasks = tasks
+        self.tree = tree
+        self.tree_version = None if tree is None else tree.version
+        self.edits = tasks.edits
+        self.offset = 0
+        for row in self.rows:
+            row.task = None
+        self.refresh()
+
+    def yview(self, *args):
+        view_height = self.body.winfo_height()
+        if args[0] == 'moveto':
+            self.offset = float(args[1]) * len(self.visible()[0]) * ROW_HEIGHT
+        elif args[0] == 'scroll':
+            step = view_height if args[2] == 'pages' else ROW_HEIGHT
+            self.offset += int(args[1]) * step
+        self.refresh()
+
+    def visible(self):
+        if self.tree is None:
+            return self.tasks.ids(), None
+        return self.tree.visible()
+
+    def refresh(self):
+        ids, depths = self.visible()
+        view_height = max(self.body.winfo_height(), 1)
+        total_height = len(ids) * ROW_HEIGHT
+        self.offset = int(max(0, min(self.offset, total_height - view_height)))
+
+        tree_version = None if self.tree is None else self.tree.version
+        if self.tasks.edits != self.edits or tree_version != self.tree_version:
+            # dates or the hierarchy changed in place, so rows showing the same task id are stale
+            self.edits = self.tasks.edits
+            self.tree_version = tree_version
+            for row in self.rows:
+                row.task = None
+
+        first = self.offset // ROW_HEIGHT
+        needed = view_height // ROW_HEIGHT + 2
+        while len(self.rows) < needed:
+            row = TaskRow(self.body, self.on_delete, self.on_edit, self.on_toggle)
+            for widget in (row, row.name_label, row.start_label, row.end_label, row.duration_label):
+                self.bind_wheel(widget)
+            self.rows.append(row)
+
+        for i, row in enumerate(self.rows):
+            index = first + i
+            if i < needed and index < len(ids):
+                task_id = int(ids[index])
+                if depths is None:
+                    row.show(self.tasks, task_id)
+                else:
+                    expanded = task_id in self.tree.expanded if self.tree.is_summary(task_id) else None
+                    row.show(self.tasks, task_id, int(depths[index]), expanded)
+                row.place(x=0, y=index * ROW_HEIGHT - self.offset, relwidth=1)
+            else:
+                row.task = None
+                row.place_forget()
+
+        if total_height > view_height:
+            self.scrollbar.set(self.offset / total_height, (self.offset + view_height) / total_height)
+        else:
+            self.scrollbar.set(0, 1)
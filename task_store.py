@@ -0,0 +1,328 @@
+from bisect import bisect_right
+from datetime import datetime
+
+import numpy as np
+
+INITIAL_CAPACITY = 64
+COLUMNS = ('starts', 'ends', 'colors', 'name_ids', 'alive', 'edited')
+ENCODE_CHUNK = 65536
+
+
+def _matches(data, offsets, text):
+    # indices of the strings equal to text; candidates of the right length are narrowed
+    # one byte at a time, so nothing is decoded
+    candidates = np.flatnonzero(np.diff(offsets) == len(text))
+    starts = offsets[candidates].astype(np.int64)
+    for position, byte in enumerate(text):
+        keep = data[starts + position] == byte
+        candidates, starts = candidates[keep], starts[keep]
+    return candidates
+
+
+class StringTable:
+    # Strings as one UTF-8 blob with uint64 offsets, the layout of the .gantt name blocks,
+    # so a million names cost their bytes instead of a Python str each. Blocks of a mapped
+    # project file are read in place; appended strings go into a growable blob.
+    def __init__(self, buffer=None):
+        self.buffer = buffer
+        self.first_ids = []
+        self.blocks = []
+        self.base_count = 0
+        self.data = np.empty(INITIAL_CAPACITY * 16, dtype=np.uint8)
+        self.offsets = np.zeros(INITIAL_CAPACITY + 1, dtype=np.uint64)
+        self.count = 0
+
+    def add_block(self, offsets, blob_start):
+        self.first_ids.append(self.base_count)
+        self.blocks.append((offsets, blob_start))
+        self.base_count += len(offsets) - 1
+
+    def __len__(self):
+        return self.base_count + self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = int(index)
+        if index < 0:
+            index += len(self)
+        if index >= self.base_count:
+            local = index - self.base_count
+            if local >= self.count:
+                raise IndexError(index)
+            return self.data[int(self.offsets[local]):int(self.offsets[local + 1])].tobytes().decode("utf-8")
+        block = bisect_right(self.first_ids, index) - 1
+        offsets, blob_start = self.blocks[block]
+        local = index - self.first_ids[block]
+        start = blob_start + int(offsets[local])
+        end = blob_start + int(offsets[local + 1])
+        return self.buffer[start:end].decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, text):
+        self.extend([text])
+
+    def extend(self, texts):
+        # encoded a chunk at a time, so there is never a bytes object per string for the whole batch
+        blobs, lengths, chunk = [], [], []
+        for text in texts:
+            chunk.append(text.encode("utf-8"))
+            if len(chunk) == ENCODE_CHUNK:
+                blobs.append(b"".join(chunk))
+                lengths.append(np.fromiter(map(len, chunk), dtype=np.uint64, count=len(chunk)))
+                chunk = []
+        if chunk:
+            blobs.append(b"".join(chunk))
+            lengths.append(np.fromiter(map(len, chunk), dtype=np.uint64, count=len(chunk)))
+        if not blobs:
+            return
+        lengths = np.concatenate(lengths)
+        used = int(self.offsets[self.count])
+        needed = used + sum(len(blob) for blob in blobs)
+        if needed > len(self.data):
+            data = np.empty(max(2 * len(self.data), needed), dtype=np.uint8)
+            data[:used] = self.data[:used]
+            self.data = data
+        if self.count + len(lengths) + 1 > len(self.offsets):
+            offsets = np.empty(max(2 * len(self.offsets), self.count + len(lengths) + 1), dtype=np.uint64)
+            offsets[:self.count + 1] = self.offsets[:self.count + 1]
+            self.offsets = offsets
+        for blob in blobs:
+            self.data[used:used + len(blob)] = np.frombuffer(blob, dtype=np.uint8)
+            used += len(blob)
+        end = self.count + len(lengths) + 1
+        np.cumsum(lengths, out=self.offsets[self.count + 1:end])
+        self.offsets[self.count + 1:end] += self.offsets[self.count]
+        self.count += len(lengths)
+
+    def find(self, text):
+        # ids of every entry equal to text
+        text = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+        found = []
+        if self.blocks:
+            buffer = np.frombuffer(self.buffer, dtype=np.uint8)
+            for first_id, (offsets, blob_start) in zip(self.first_ids, self.blocks):
+                found.append(first_id + _matches(buffer[blob_start:], offsets, text))
+        found.append(self.base_count + _matches(self.data, self.offsets[:self.count + 1], text))
+        return np.concatenate(found)
+
+    def encoded(self, first=0):
+        # (offsets, blob) of the entries from first on, in the .gantt layout, without decoding
+        parts, offsets, size = [], [np.zeros(1, dtype=np.uint64)], 0
+        blocks = [(self.buffer, blob_start, block_offsets, first_id)
+                  for first_id, (block_offsets, blob_start) in zip(self.first_ids, self.blocks)]
+        blocks.append((self.data, 0, self.offsets[:self.count + 1], self.base_count))
+        for buffer, blob_start, block_offsets, first_id in blocks:
+            lo = max(first - first_id, 0)
+            if lo >= len(block_offsets) - 1:
+                continue
+            start, end = int(block_offsets[lo]), int(block_offsets[-1])
+            parts.append(bytes(buffer[blob_start + start:blob_start + end]))
+            offsets.append(block_offsets[lo + 1:] - np.uint64(start) + np.uint64(size))
+            size += end - start
+        return np.concatenate(offsets), b"".join(parts)
+
+    def copy(self):
+        table = StringTable(self.buffer)
+        table.first_ids = self.first_ids
+        table.blocks = self.blocks
+        table.base_count = self.base_count
+        table.data = self.data[:int(self.offsets[self.count])].copy()
+        table.offsets = self.offsets[:self.count + 1].copy()
+        table.count = self.count
+        return table
+
+    def detach(self):
+        # copies the mapped blocks into the blob, so the file can be replaced
+        if self.blocks:
+            offsets, blob = self.encoded()
+            self.__init__()
+            self.data = np.frombuffer(blob, dtype=np.uint8).copy()
+            self.offsets = offsets
+            self.count = len(offsets) - 1
+
+    def nbytes(self):
+        return self.data.nbytes + self.offsets.nbytes
+
+
+class TaskStore:
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self.size = 0
+        self.count = 0
+        self.starts = np.empty(capacity, dtype=np.int32)
+        self.ends = np.empty(capacity, dtype=np.int32)
+        self.colors = np.empty(capacity, dtype=np.uint16)
+        self.name_ids = np.empty(capacity, dtype=np.int32)
+        self.alive = np.empty(capacity, dtype=np.bool_)
+        # rows whose dates changed since the project file last saved them
+        self.edited = np.empty(capacity, dtype=np.bool_)
+        self.names = StringTable()
+        self.palette = []
+        self._palette_index = {}
+        self._live_ids = None
+        self.edits = 0
+
+    @classmethod
+    def from_columns(cls, starts, ends, colors, name_ids, names, palette):
+        tasks = cls(capacity=1)
+        tasks.starts, tasks.ends, tasks.colors, tasks.name_ids = starts, ends, colors, name_ids
+        tasks.alive = np.ones(len(starts), dtype=np.bool_)
+        tasks.edited = np.zeros(len(starts), dtype=np.bool_)
+        tasks.size = tasks.count = len(starts)
+        tasks.names = names
+        tasks.palette = list(palette)
+        tasks._palette_index = {color: i for i, color in enumerate(tasks.palette)}
+        return tasks
+
+    def detach(self):
+        for column in COLUMNS:
+            setattr(self, column, np.array(getattr(self, column)))
+        self.names.detach()
+
+    def __len__(self):
+        return self.count
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        capacity = len(self.starts)
+        if needed <= capacity:
+            return
+        capacity = max(capacity, INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+        for column in COLUMNS:
+            old = getattr(self, column)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, column, new)
+
+    def find(self, name):
+        # the last live task with this name; a name can have several entries in the table
+        name_ids = self.names.find(name)
+        if not len(name_ids):
+            return None
+        ids = self.ids()
+        matches = ids[np.isin(self.name_ids[ids], name_ids)]
+        return int(matches[-1]) if len(matches) else None
+
+    def intern_color(self, color):
+        color_id = self._palette_index.get(color)
+        if color_id is None:
+            color_id = self._palette_index[color] = len(self.palette)
+            self.palette.append(color)
+        return color_id
+
+    def append(self, name, start, end, color):
+        if hasattr(start, 'toordinal'):
+            start = start.toordinal()
+        if hasattr(end, 'toordinal'):
+            end = end.toordinal()
+        self._reserve(1)
+        task_id = self.size
+        self.starts[task_id] = start
+        self.ends[task_id] = end
+        self.colors[task_id] = self.intern_color(color)
+        self.name_ids[task_id] = len(self.names)
+        self.names.append(name)
+        self.alive[task_id] = True
+        self.edited[task_id] = False
+        self.size += 1
+        self.count += 1
+        self._live_ids = None
+        return task_id
+
+    def extend(self, names, starts, ends, colors):
+        n = len(names)
+        self._reserve(n)
+        first = self.size
+        last = first + n
+        self.starts[first:last] = starts
+        self.ends[first:last] = ends
+        intern_color = self.intern_color
+        if isinstance(colors, np.ndarray) and colors.dtype.kind in 'iu':
+            self.colors[first:last] = colors
+        else:
+            self.colors[first:last] = [intern_color(color) for color in colors]
+        # names repeated within the batch share one entry; the dict only lives for the batch
+        batch = {}
+        self.name_ids[first:last] = np.fromiter((batch.setdefault(name, len(batch)) for name in names),
+                                                dtype=np.int32, count=n) + len(self.names)
+        self.names.extend(batch)
+        self.alive[first:last] = True
+        self.edited[first:last] = False
+        self.size = last
+        self.count += n
+        self._live_ids = None
+        return range(first, last)
+
+    def set_dates(self, ids, starts, ends):
+        self.starts[ids] = starts
+        self.ends[ids] = ends
+        self.edited[ids] = True
+        self.edits += 1
+
+    def remove(self, task_id):
+        if self.alive[task_id]:
+            self.alive[task_id] = False
+            self.count -= 1
+            self._live_ids = None
+
+    def clear(self):
+        self.__init__()
+
+    def snapshot(self):
+        copy = TaskStore(capacity=max(self.size, 1))
+        for column in COLUMNS:
+            getattr(copy, column)[:self.size] = getattr(self, column)[:self.size]
+        copy.size = self.size
+        copy.count = self.count
+        copy.names = self.names.copy()
+        copy.palette = list(self.palette)
+        copy._palette_index = dict(self._palette_index)
+        return copy
+
+    def ids(self):
+        if self._live_ids is None:
+            self._live_ids = np.flatnonzero(self.alive[:self.size])
+        return self._live_ids
+
+    def columns(self):
+        # views over the current buffers: an append that has to grow them moves the columns,
+        # so fetch them again after any append
+        return {
+            'starts': self.starts[:self.size],
+            'ends': self.ends[:self.size],
+            'colors': self.colors[:self.size],
+            'name_ids': self.name_ids[:self.size],
+            'alive': self.alive[:self.size],
+        }
+
+    def live_columns(self):
+        ids = self.ids()
+        return ids, self.starts[ids], self.ends[ids], self.colors[ids], self.name_ids[ids]
+
+    def get(self, task_id):
+        start = int(self.starts[task_id])
+        end = int(self.ends[task_id])
+        return {
+            'id': task_id,
+            'name': self.names[self.name_ids[task_id]],
+            'start': datetime.fromordinal(start),
+            'end': datetime.fromordinal(end),
+            'color': self.palette[self.colors[task_id]],
+            'duration': end - start + 1
+        }
+
+    def __iter__(self):
+        for task_id in self.ids():
+            yield self.get(int(task_id))
+
+    def extent(self):
+        ids = self.ids()
+        return int(self.starts[ids].min()), int(self.ends[ids].max())
+
+    def nbytes(self):
+        return sum(getattr(self, column).nbytes for column in COLUMNS) + self.names.nbytes()
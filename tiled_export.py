@@ -0,0 +1,272 @@
+import json
+import math
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from gantt_render import GanttChart, no_check
+from hierarchy import PageRows
+from persian_calendar import persian_text
+from task_store import TaskStore
+
+PAGE_MODES = ('pdf', 'png', 'pyramid')
+ROWS_PER_PAGE = 40
+ROW_INCHES = 0.4
+PAGE_WIDTH = 12
+HEADER_INCHES = 1.4
+FOOTER_INCHES = 1.0
+SIDE_INCHES = 0.4
+NAME_INCHES = 2.4
+TILE_SIZE = 256
+PYRAMID_INFO = "pyramid.json"
+
+
+def page_ranges(count, rows_per_page):
+    # row 0 is drawn at the bottom of the chart, so the first page holds the last rows
+    pages = []
+    for last in range(count, 0, -rows_per_page):
+        pages.append((max(0, last - rows_per_page), last))
+    return pages
+
+
+def page_size(rows_per_page, dpi, tile_size=None):
+    width, height = PAGE_WIDTH, HEADER_INCHES + FOOTER_INCHES + rows_per_page * ROW_INCHES
+    if tile_size:
+        # whole tiles per page, so a page never splits a tile of the pyramid
+        width = math.ceil(width * dpi / tile_size) * tile_size / dpi
+        height = math.ceil(height * dpi / tile_size) * tile_size / dpi
+    return width, height
+
+
+def page_rows(tasks, tree=None):
+    # (ids, depths) in display order: every live task, or the rows the hierarchy shows
+    if tree is None:
+        return tasks.ids(), None
+    return tree.visible()
+
+
+def page_jobs(tasks, rows_per_page, dpi, highlight=None, tile_size=None, tree=None):
+    # each job carries only its own rows, so a worker never receives the whole project
+    ids, depths = page_rows(tasks, tree)
+    date_range = (int(tasks.starts[ids].min()), int(tasks.ends[ids].max()))
+    pages = page_ranges(len(ids), rows_per_page)
+    for number, (first, last) in enumerate(pages):
+        page_ids = ids[first:last]
+        page_tree = None
+        if tree is not None:
+            page_tree = (depths[first:last].copy(), tree.is_summary(page_ids),
+                         np.isin(page_ids, list(tree.expanded)))
+        page_highlight = None
+        if highlight is not None:
+            page_highlight = np.zeros(len(page_ids), dtype=bool)
+            known = page_ids < len(highlight)
+            page_highlight[known] = highlight[page_ids[known]]
+        yield {
+            'number': number,
+            'pages': len(pages),
+            'starts': tasks.starts[page_ids].copy(),
+            'ends': tasks.ends[page_ids].copy(),
+            'colors': tasks.colors[page_ids].copy(),
+            'names': [tasks.names[name_id] for name_id in tasks.name_ids[page_ids].tolist()],
+            'palette': list(tasks.palette),
+            'highlight': page_highlight,
+            'tree': page_tree,
+            'date_range': date_range,
+            'rows_per_page': rows_per_page,
+            'dpi': dpi,
+            'tile_size': tile_size,
+        }
+
+
+def build_page(job):
+    count = len(job['starts'])
+    tasks = TaskStore.from_columns(job['starts'], job['ends'], job['colors'],
+                                   np.arange(count, dtype=np.int32), job['names'], job['palette'])
+    width, height = page_size(job['rows_per_page'], job['dpi'], job['tile_size'])
+    margins = {
+        'left': SIDE_INCHES / width,
+        'right': 1 - NAME_INCHES / width,
+        'top': 1 - HEADER_INCHES / height,
+        'bottom': FOOTER_INCHES / height,
+    }
+    tree = None if job['tree'] is None else PageRows(*job['tree'])
+    chart = GanttChart(tasks, figsize=(width, height), highlight=job['highlight'], date_range=job['date_range'],
+                       margins=margins, tree=tree)
+    # short last page: keep the row height of the other pages and leave the bottom empty
+    chart.ax.set_ylim(count - job['rows_per_page'] - 0.5, count - 0.5)
+    chart.ax.tick_params(axis='x', which='both', labeltop=True)
+    chart.ax.set_title(persian_text(f"نمودار گانت پروژه - صفحه {job['number'] + 1} از {job['pages']}"),
+                       pad=20, fontsize=14, fontweight='bold', loc='right')
+    return chart
+
+
+def render_png_page(job, directory):
+    chart = build_page(job)
+    path = os.path.join(directory, f"page_{job['number'] + 1:04d}.png")
+    chart.figure.savefig(path, dpi=job['dpi'], facecolor='white')
+    return [path]
+
+
+def render_tile_page(job, directory):
+    chart = build_page(job)
+    canvas = chart.figure.canvas
+    canvas.draw()
+    width, height = page_size(job['rows_per_page'], job['dpi'], job['tile_size'])
+    tile = job['tile_size']
+    columns, rows = round(width * job['dpi']) // tile, round(height * job['dpi']) // tile
+    image = np.asarray(canvas.buffer_rgba())
+    if image.shape[0] < rows * tile or image.shape[1] < columns * tile:
+        image = np.pad(image, ((0, max(0, rows * tile - image.shape[0])), (0, max(0, columns * tile - image.shape[1])),
+                               (0, 0)), constant_values=255)
+
+    from PIL import Image
+    level_dir = os.path.join(directory, str(job['level']))
+    paths = []
+    for y in range(rows):
+        for x in range(columns):
+            path = os.path.join(level_dir, f"{x}_{job['number'] * rows + y}.png")
+            Image.fromarray(image[y * tile:(y + 1) * tile, x * tile:(x + 1) * tile]).save(path)
+            paths.append(path)
+    return paths
+
+
+def render_page(job, directory, mode):
+    if mode == 'png':
+        return render_png_page(job, directory)
+    return render_tile_page(job, directory)
+
+
+def reduce_tile_row(directory, level, y, columns):
+    # one row of a coarser pyramid level: every tile is the 2x2 block below it, halved
+    from PIL import Image
+    child_dir = os.path.join(directory, str(level + 1))
+    paths = []
+    for x in range(columns):
+        children = [[None, None], [None, None]]
+        for dy in (0, 1):
+            for dx in (0, 1):
+                child = os.path.join(child_dir, f"{2 * x + dx}_{2 * y + dy}.png")
+                if os.path.exists(child):
+                    children[dy][dx] = Image.open(child)
+        width = sum(child.width for child in children[0] if child is not None)
+        height = sum(row[0].height for row in children if row[0] is not None)
+        block = Image.new('RGBA', (width, height), 'white')
+        for dy, row in enumerate(children):
+            for dx, child in enumerate(row):
+                if child is not None:
+                    block.paste(child, (dx * children[0][0].width, dy * children[0][0].height))
+                    child.close()
+        path = os.path.join(directory, str(level), f"{x}_{y}.png")
+        block.resize(((width + 1) // 2, (height + 1) // 2), Image.LANCZOS).save(path)
+        paths.append(path)
+    return paths
+
+
+def run_jobs(pool, workers, function, jobs, check, phase, total):
+    # at most two jobs per worker are in flight, so memory stays bounded by a few pages
+    # however many pages the project has
+    done = 0
+    if pool is None:
+        for args in jobs:
+            function(*args)
+            done += 1
+            check(done / total, phase)
+        return
+    pending = deque()
+    for args in jobs:
+        pending.append(pool.submit(function, *args))
+        if len(pending) >= 2 * workers:
+            pending.popleft().result()
+            done += 1
+            check(done / total, phase)
+    while pending:
+        pending.popleft().result()
+        done += 1
+        check(done / total, phase)
+
+
+def export_pdf(tasks, path, rows_per_page, dpi, highlight, tree, check):
+    # a multi-page PDF is written by a single process; each page is drawn and dropped in turn
+    from matplotlib.backends.backend_pdf import PdfPages
+    partial = path + '.part'
+    pages = len(page_ranges(len(page_rows(tasks, tree)[0]), rows_per_page))
+    try:
+        with PdfPages(partial) as pdf:
+            for job in page_jobs(tasks, rows_per_page, dpi, highlight, tree=tree):
+                pdf.savefig(build_page(job).figure, facecolor='white')
+                check((job['number'] + 1) / pages, 'pages')
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return path
+
+
+def export_pyramid(tasks, directory, rows_per_page, dpi, highlight, tree, pool, jobs, check):
+    pages = len(page_ranges(len(page_rows(tasks, tree)[0]), rows_per_page))
+    width, height = page_size(rows_per_page, dpi, TILE_SIZE)
+    columns = round(width * dpi) // TILE_SIZE
+    rows = round(height * dpi) // TILE_SIZE * pages
+    levels = math.ceil(math.log2(max(columns, rows))) + 1
+    for level in range(levels):
+        os.makedirs(os.path.join(directory, str(level)), exist_ok=True)
+
+    def base_jobs():
+        for job in page_jobs(tasks, rows_per_page, dpi, highlight, TILE_SIZE, tree):
+            job['level'] = levels - 1
+            yield job, directory, 'pyramid'
+
+    run_jobs(pool, jobs, render_page, base_jobs(), check, 'pages', pages)
+    for level in range(levels - 2, -1, -1):
+        scale = 2 ** (levels - 1 - level)
+        level_columns, level_rows = math.ceil(columns / scale), math.ceil(rows / scale)
+        run_jobs(pool, jobs, reduce_tile_row, ((directory, level, y, level_columns) for y in range(level_rows)),
+                 check, 'tiles', level_rows)
+
+    with open(os.path.join(directory, PYRAMID_INFO), 'w', encoding='utf-8') as f:
+        json.dump({
+            'width': columns * TILE_SIZE,
+            'height': rows * TILE_SIZE,
+            'tile_size': TILE_SIZE,
+            'levels': levels,
+            'pages': pages,
+            'format': 'png',
+            'path': '{level}/{x}_{y}.png',
+        }, f, indent=2)
+    return directory
+
+
+def export_pages(tasks, path, mode='pdf', rows_per_page=ROWS_PER_PAGE, dpi=150, jobs=1, highlight=None,
+                 tree=None, check=no_check):
+    # Very large charts are exported as pages of rows_per_page rows instead of one bitmap;
+    # every page repeats the Jalali date header and shares the project's date range.
+    # 'pdf' writes one multi-page file, 'png' a directory of page images and 'pyramid'
+    # a directory of TILE_SIZE tiles per zoom level for web viewers. With a tree the pages
+    # hold the rows the hierarchy shows, collapsed subtrees left out.
+    if mode not in PAGE_MODES:
+        raise ValueError(f"حالت خروجی نامعتبر: {mode}")
+    if rows_per_page < 1:
+        raise ValueError(f"تعداد ردیف هر صفحه باید مثبت باشد: {rows_per_page}")
+    if not tasks:
+        raise ValueError("تسکی برای نمایش وجود ندارد")
+    check(0.0, 'pages')
+    if mode == 'pdf':
+        return export_pdf(tasks, path, rows_per_page, dpi, highlight, tree, check)
+
+    os.makedirs(path, exist_ok=True)
+    # spawned rather than forked workers: the app calls this from a thread next to Tk
+    pool = ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('spawn')) if jobs > 1 else None
+    try:
+        if mode == 'pyramid':
+            return export_pyramid(tasks, path, rows_per_page, dpi, highlight, tree, pool, jobs, check)
+        pages = len(page_ranges(len(page_rows(tasks, tree)[0]), rows_per_page))
+        run_jobs(pool, jobs, render_page,
+                 ((job, path, mode) for job in page_jobs(tasks, rows_per_page, dpi, highlight, tree=tree)),
+                 check, 'pages', pages)
+        return path
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)